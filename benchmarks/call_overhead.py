@@ -0,0 +1,33 @@
+"""
+Per call overhead of phonemize on short inputs, with the options passed on every call
+and with a pipeline compiled once
+
+uv run benchmarks/call_overhead.py
+"""
+
+import timeit
+from phonikud import PhonemizerConfig, phonemize, phonemizer
+
+inputs = {
+    "empty": "",
+    "word": "שָׁלוֹם",
+    "short": "שָׁלוֹם עוֹלָם!",
+    "latin": "hello",
+}
+configs = {
+    "default": PhonemizerConfig(),
+    "no expander": PhonemizerConfig(use_expander=False),
+}
+number = 20000
+
+for config_name, config in configs.items():
+    pipeline = phonemizer.compile(config)
+    options = config._asdict()
+    for name, text in inputs.items():
+        assert pipeline.phonemize(text) == phonemize(text, **options)
+        per_call = timeit.timeit(lambda: phonemize(text, **options), number=number)
+        compiled = timeit.timeit(lambda: pipeline.phonemize(text), number=number)
+        print(
+            f"{config_name:>11} {name:>6}: phonemize() {per_call / number * 1e6:6.1f}us, "
+            f"compiled {compiled / number * 1e6:6.1f}us ({per_call / compiled:.2f}x)"
+        )
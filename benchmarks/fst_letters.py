@@ -0,0 +1,61 @@
+"""
+Letters per second of phonemize_word, with the transition table and with the rules,
+and of the numpy engine when numpy is installed
+
+uv run benchmarks/fst_letters.py
+"""
+
+import csv
+import time
+from pathlib import Path
+from phonikud import hebrew
+from phonikud.utils import add_milra_hatama, get_letters
+
+tables = Path(__file__).parent / "../tests/phonemize_test_tables"
+
+
+def load_words() -> list[list]:
+    words = []
+    for file in sorted(tables.glob("*.csv")):
+        with open(file, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                words += row["hebrew_with_nikkud"].split()
+    return [get_letters(add_milra_hatama(word)) for word in words]
+
+
+def letters_per_second(function, words: list[list], repeat: int = 20) -> float:
+    count = sum(map(len, words)) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for letters in words:
+            function(letters)
+    return count / (time.perf_counter() - start)
+
+
+def batch_letters_per_second(function, words: list[list], repeat: int = 20) -> float:
+    count = sum(map(len, words)) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(words)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    words = load_words()
+    print(f"{len(words)} words, {sum(map(len, words))} letters")
+    rules = letters_per_second(hebrew.phonemize_word_rules, words)
+    hebrew.phonemize_word(words[0])  # Import time work
+    table = letters_per_second(hebrew.phonemize_word, words)
+    print(f"rules: {rules:,.0f} letters/s")
+    print(f"table: {table:,.0f} letters/s ({table / rules:.1f}x)")
+    try:
+        from phonikud.hebrew_numpy import phonemize_words
+    except ImportError:
+        return
+    # The engine is meant for large batches
+    vectorized = batch_letters_per_second(phonemize_words, words * 100)
+    print(f"numpy: {vectorized:,.0f} letters/s ({vectorized / rules:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Time each stage of the pipeline on reproducible corpora, results are printed as JSON
+
+uv run benchmarks/stages.py
+uv run benchmarks/stages.py --stages normalize phonemize_word --output results.json
+
+Corpora are built from tests/phonemize_test_tables plus synthetic text with a fixed seed:
+short (1-3 words), medium (10-20 words), long (paragraphs) and mixed (Hebrew, English,
+numbers and punctuation). Caches are bypassed so every call does the full work.
+Allocations are measured with tracemalloc in a separate pass.
+"""
+
+import argparse
+import csv
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+from phonikud.expander import Expander
+from phonikud.hebrew import phonemize_word
+from phonikud.phonemize import Phonemizer
+from phonikud.pipeline import PhonemizerConfig
+from phonikud.utils import (
+    add_milra_hatama,
+    get_letters,
+    normalize,
+    post_clean,
+    post_normalize,
+)
+
+tables = Path(__file__).parent / "../tests/phonemize_test_tables"
+SEED = 1234
+LATIN = ["hello", "world", "Python", "AI", "Deep", "Learning", "TTS", "model"]
+NUMBERS = ["12", "2024-01-15", "22:30", "3.5", "100", "5pm"]
+
+
+def load_words() -> list[str]:
+    words = []
+    for file in sorted(tables.glob("*.csv")):
+        with open(file, encoding="utf-8") as f:
+            words += [row["hebrew_with_nikkud"] for row in csv.DictReader(f)]
+    # Only Hebrew words, the tables also have numbers etc.
+    return [w for w in words if w and all(c not in "0123456789" for c in w)]
+
+
+def make_corpora(words: list[str], size: int) -> dict[str, list[str]]:
+    rng = random.Random(SEED)
+
+    def sentence(count: int, mixed=False) -> str:
+        parts = []
+        for _ in range(count):
+            roll = rng.random()
+            if mixed and roll < 0.15:
+                parts.append(rng.choice(LATIN))
+            elif mixed and roll < 0.25:
+                parts.append(rng.choice(NUMBERS))
+            else:
+                parts.append(rng.choice(words))
+            if rng.random() < 0.1:
+                parts[-1] += rng.choice(",.!?")
+        return " ".join(parts)
+
+    return {
+        "short": [sentence(rng.randint(1, 3)) for _ in range(size)],
+        "medium": [sentence(rng.randint(10, 20)) for _ in range(size)],
+        "long": [sentence(rng.randint(100, 200)) for _ in range(max(size // 10, 1))],
+        "mixed": [sentence(rng.randint(10, 20), mixed=True) for _ in range(size)],
+    }
+
+
+def make_stages() -> dict[str, Callable[[str], list[tuple[Callable, object]]]]:
+    """
+    Stage name -> function that turns a text into the (function, argument) calls to time
+    Inputs of later stages are prepared from the earlier ones so only the stage is timed
+    """
+    expander = Expander()
+    expander.dictionary  # noqa: B018
+    phonemizer = Phonemizer(cache_size=0)
+    pipeline = phonemizer.compile(PhonemizerConfig())
+    he_words = Phonemizer.hebrew_re.findall
+
+    def normalize_uncached(text: str) -> str:
+        # normalize caches segments
+        normalize.cache_clear()
+        return normalize(text)
+
+    def word_calls(function: Callable, prepare: Callable = lambda w: w):
+        return lambda text: [
+            (function, prepare(w)) for w in he_words(normalize_uncached(text))
+        ]
+
+    def phonemized(word: str) -> str:
+        return "".join(phonemize_word(get_letters(add_milra_hatama(word))))
+
+    def uncached_phonemize(text: str) -> str:
+        normalize.cache_clear()
+        return pipeline.phonemize(text)
+
+    return {
+        "normalize": lambda text: [(normalize_uncached, text)],
+        "expand_text": lambda text: [(expander.expand_text, normalize_uncached(text))],
+        "get_letters": word_calls(get_letters),
+        "add_milra_hatama": word_calls(add_milra_hatama),
+        "phonemize_word": word_calls(
+            phonemize_word, lambda w: get_letters(add_milra_hatama(w))
+        ),
+        "post_normalize": word_calls(post_normalize, phonemized),
+        "post_clean": word_calls(post_clean, phonemized),
+        "phonemize": lambda text: [(uncached_phonemize, text)],
+    }
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    index = min(int(q * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_stage(calls: list[list[tuple[Callable, object]]], words: int, repeat: int):
+    # Argument objects are reused between repeats, phonemize_word doesn't change letters
+    latencies = []
+    total = 0.0
+    for _ in range(repeat):
+        for text_calls in calls:
+            start = time.perf_counter()
+            for function, argument in text_calls:
+                function(argument)
+            elapsed = time.perf_counter() - start
+            latencies.append(elapsed)
+            total += elapsed
+
+    tracemalloc.start()
+    for text_calls in calls:
+        for function, argument in text_calls:
+            function(argument)
+    allocated, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+
+    latencies.sort()
+    return {
+        "texts": len(calls),
+        "words": words,
+        "seconds": total,
+        "words_per_second": words * repeat / total if total else None,
+        "latency_us": {
+            "mean": statistics.fmean(latencies) * 1e6,
+            "p50": percentile(latencies, 0.5) * 1e6,
+            "p90": percentile(latencies, 0.9) * 1e6,
+            "p99": percentile(latencies, 0.99) * 1e6,
+            "max": latencies[-1] * 1e6,
+        },
+        "allocations": {
+            "peak_bytes": peak,
+            "retained_bytes": allocated,
+            "retained_blocks": blocks,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    stages = make_stages()
+    parser.add_argument("--stages", nargs="+", choices=list(stages), default=None)
+    parser.add_argument("--corpora", nargs="+", default=None)
+    parser.add_argument("--size", type=int, default=200, help="Texts per corpus")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="Write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    corpora = make_corpora(load_words(), args.size)
+    results = {
+        "meta": {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "seed": SEED,
+            "size": args.size,
+            "repeat": args.repeat,
+        },
+        "stages": {},
+    }
+    for stage in args.stages or stages:
+        results["stages"][stage] = {}
+        for corpus in args.corpora or corpora:
+            texts = corpora[corpus]
+            calls = [stages[stage](text) for text in texts]
+            words = sum(len(text.split()) for text in texts)
+            results["stages"][stage][corpus] = run_stage(calls, words, args.repeat)
+            print(f"{stage} {corpus} done", file=sys.stderr)
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
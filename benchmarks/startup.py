@@ -0,0 +1,41 @@
+"""
+Import time and first call latency of phonikud in fresh processes, compared to a budget
+
+uv run benchmarks/startup.py
+"""
+
+import statistics
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = 50
+FIRST_CALL_BUDGET_MS = 250
+RUNS = 10
+
+script = """
+import time
+start = time.perf_counter()
+import phonikud
+imported = time.perf_counter()
+phonikud.phonemize("שָׁלוֹם עוֹלָם 12")
+done = time.perf_counter()
+print((imported - start) * 1000, (done - imported) * 1000)
+"""
+
+import_times, first_call_times = [], []
+for _ in range(RUNS):
+    output = subprocess.check_output([sys.executable, "-c", script], text=True)
+    import_ms, first_call_ms = map(float, output.split())
+    import_times.append(import_ms)
+    first_call_times.append(first_call_ms)
+
+ok = True
+for name, times, budget in [
+    ("import phonikud", import_times, IMPORT_BUDGET_MS),
+    ("first phonemize", first_call_times, FIRST_CALL_BUDGET_MS),
+]:
+    median = statistics.median(times)
+    status = "ok" if median <= budget else "over budget"
+    ok = ok and median <= budget
+    print(f"{name}: median {median:.1f}ms, budget {budget}ms ({status})")
+sys.exit(0 if ok else 1)
@@ -0,0 +1,46 @@
+"""
+Share one Phonemizer between threads and check that results match a sequential run
+
+uv run benchmarks/thread_scaling.py
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import pandas as pd
+from phonikud import lexicon
+from phonikud.phonemize import Phonemizer
+from phonikud.pipeline import PhonemizerConfig
+
+tables = Path(__file__).parent / "../tests/phonemize_test_tables"
+words = pd.concat(pd.read_csv(f) for f in tables.glob("*.csv")).hebrew_with_nikkud
+sentences = [" ".join(words[i : i + 12]) + " hello" for i in range(0, len(words), 12)]
+# Every sentence gets its own fallback phonemes, they must not leak into other calls
+sentences = [f"{s} [x](/{chr(0x250 + i % 32)}/)" for i, s in enumerate(sentences)]
+texts = sentences * 20
+
+options = {**PhonemizerConfig()._asdict(), "fallback": lambda word: "ɜ" + word}
+
+
+def run(phonemizer: Phonemizer, threads: int) -> tuple[list[str], float]:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(
+            executor.map(lambda text: phonemizer.phonemize(text, **options), texts)
+        )
+    return results, time.perf_counter() - start
+
+
+phonemizer = Phonemizer()
+expected = [phonemizer.phonemize(text, **options) for text in texts]
+
+for threads in [1, 2, 4, 8, 16]:
+    phonemizer.clear_cache()
+    results, elapsed = run(phonemizer, threads)
+    status = "ok" if results == expected else "MISMATCH"
+    print(
+        f"threads={threads:<3} {len(texts) / elapsed:8.1f} texts/s "
+        f"{elapsed:6.2f}s results={status}"
+    )
+
+assert not lexicon.ADDITIONAL_PHONEMES, "global phonemes inventory was modified"
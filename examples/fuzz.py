@@ -1,28 +1,22 @@
 """
 fuzzing with millions of words to make sure it works fine
 git clone https://github.com/thewh1teagle/hebrew_diacritized
-uv run examples/fuzz.py hebrew_diacritized/data
+uv run examples/fuzz.py hebrew_diacritized/data fuzz_output
+
+Files are sharded and phonemized on all cores, run it again to resume after a crash
 """
 
 import sys
 from pathlib import Path
-from tqdm import tqdm
-from phonikud import phonemize
+from phonikud import phonemize_corpus
 
 target_dir = sys.argv[1]
-files = sorted(Path(target_dir).glob("**/*.txt"), key=lambda f: f.stat().st_size)
+output_dir = sys.argv[2] if len(sys.argv) > 2 else "fuzz_output"
+files = sorted(Path(target_dir).glob("**/*.txt"))
 
-total_size_bytes = sum(f.stat().st_size for f in files)
-total_size_mb = total_size_bytes / (1024 * 1024)
+total_size_mb = sum(f.stat().st_size for f in files) / (1024 * 1024)
 print(f"Found {len(files)} files with total size of {total_size_mb:.2f} MB")
 
-for file in tqdm(files, desc="Files"):
-    # First pass: count lines without storing them
-    with open(file, "r", encoding="utf-8") as f:
-        num_lines = sum(1 for _ in f)
-
-    # Second pass: process lines with progress bar
-    with open(file, "r", encoding="utf-8") as f:
-        for line in tqdm(f, total=num_lines, desc=f"{file.name}", leave=False):
-            phonemes = phonemize(line)
-            # print(phonemes)
+manifest = phonemize_corpus(files, output_dir)
+lines = sum(shard["lines"] for shard in manifest["shards"])
+print(f"Phonemized {lines} lines into {len(manifest['shards'])} shards in {output_dir}")
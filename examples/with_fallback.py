@@ -12,11 +12,15 @@ EspeakWrapper.set_library(espeakng_loader.get_library_path())
 EspeakWrapper.set_data_path(espeakng_loader.get_data_path())
 
 
-def fallback(text: str) -> str:
+def phonemize_words(words: list[str]) -> list[str]:
     """
     Make sure to return valid IPA phonemes and punctuation here
     """
-    return phonemizer.phonemize(text)
+    return phonemizer.phonemize(words)
+
+
+# All English words of the text are phonemized in one espeak call
+fallback = phonikud.BatchFallback(phonemize_words)
 
 
 text = """
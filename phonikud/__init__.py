@@ -1,12 +1,87 @@
 """
 High level phonemize functions
+
+Importing phonikud is cheap, the phonemizer and its dependencies are loaded on
+the first call (or with warmup())
 """
 
-from .phonemize import Phonemizer
-from .utils import normalize  # noqa: F401
-from typing import Callable, Literal
+import importlib
+import sys
+import threading
+import types
+from typing import TYPE_CHECKING, Awaitable, Callable, Literal, Mapping
+
+if TYPE_CHECKING:
+    from .batch import phonemize_batch, phonemize_stream  # noqa: F401
+    from .corpus import phonemize_corpus, read_corpus  # noqa: F401
+    from .fallback import BatchFallback  # noqa: F401
+    from .phonemize import Phonemizer
+    from .pipeline import PhonemizerConfig  # noqa: F401
+    from .tokens import Token
+    from .utils import normalize  # noqa: F401
+
+# Public names imported on first access
+_LAZY_IMPORTS = {
+    "Phonemizer": "phonikud.phonemize",
+    "PhonemizerConfig": "phonikud.pipeline",
+    "Token": "phonikud.tokens",
+    "BatchFallback": "phonikud.fallback",
+    "normalize": "phonikud.utils",
+    "phonemize_batch": "phonikud.batch",
+    "phonemize_stream": "phonikud.batch",
+    "phonemize_corpus": "phonikud.corpus",
+    "read_corpus": "phonikud.corpus",
+}
+
+_phonemizer: "Phonemizer" = None
+_phonemizer_lock = threading.Lock()
+
+
+def get_phonemizer() -> "Phonemizer":
+    """
+    The shared Phonemizer used by phonemize(), created on first use
+    """
+    global _phonemizer
+    if _phonemizer is None:
+        with _phonemizer_lock:
+            if _phonemizer is None:
+                from .phonemize import Phonemizer
+
+                _phonemizer = Phonemizer()
+    return _phonemizer
+
+
+def __getattr__(name: str):
+    if name == "phonemizer":
+        return get_phonemizer()
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-phonemizer = Phonemizer()
+
+def __dir__():
+    return sorted([*globals(), *_LAZY_IMPORTS, "phonemizer"])
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # Importing the phonemize submodule later must not replace the phonemize function
+        if name == "phonemize" and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
+
+def warmup():
+    """
+    Load the phonemizer, dictionaries and dependencies now instead of on the first call
+    eg. at server startup, so that the first request is fast
+    """
+    get_phonemizer().warmup()
 
 
 def phonemize(
@@ -17,13 +92,15 @@ def phonemize(
     use_post_normalize=True,  # For TTS
     predict_stress=True,
     predict_vocal_shva=True,
-    schema: Literal["plain", "modern"] = "modern",
+    schema: Literal["plain", "modern"] | Mapping[str, str] = "modern",
     fallback: Callable[[str], str] = None,
-) -> str:
+    return_tokens=False,
+) -> "str | list[Token]":
     """
     Set stress_at_start=True to place stress at syllable start.
+    Set return_tokens=True to get a list of Token with spans in the source text.
     """
-    phonemes = phonemizer.phonemize(
+    phonemes = get_phonemizer().phonemize(
         text,
         preserve_punctuation=preserve_punctuation,
         preserve_stress=preserve_stress,
@@ -33,5 +110,36 @@ def phonemize(
         predict_stress=predict_stress,
         schema=schema,
         predict_vocal_shva=predict_vocal_shva,
+        return_tokens=return_tokens,
     )
     return phonemes
+
+
+async def phonemize_async(
+    text: str,
+    preserve_punctuation=True,
+    preserve_stress=True,
+    use_expander=True,
+    use_post_normalize=True,  # For TTS
+    predict_stress=True,
+    predict_vocal_shva=True,
+    schema: Literal["plain", "modern"] | Mapping[str, str] = "modern",
+    fallback: Callable[[str], Awaitable[str] | str] = None,
+    return_tokens=False,
+) -> "str | list[Token]":
+    """
+    Same as phonemize for asyncio, fallback may be an async function.
+    Fallback words of the text are awaited concurrently.
+    """
+    return await get_phonemizer().phonemize_async(
+        text,
+        preserve_punctuation=preserve_punctuation,
+        preserve_stress=preserve_stress,
+        fallback=fallback,
+        use_expander=use_expander,
+        use_post_normalize=use_post_normalize,
+        predict_stress=predict_stress,
+        schema=schema,
+        predict_vocal_shva=predict_vocal_shva,
+        return_tokens=return_tokens,
+    )
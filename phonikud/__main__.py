@@ -0,0 +1,3 @@
+from phonikud.cli import main
+
+main()
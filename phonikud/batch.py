@@ -0,0 +1,190 @@
+"""
+Batch and streaming phonemization across a process pool
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Literal, Mapping
+from phonikud.phonemize import Phonemizer
+from phonikud.pipeline import Pipeline, PhonemizerConfig
+from phonikud.tokens import Token
+from phonikud.log import log
+
+# Per worker process state, set once by _init_worker
+_worker_phonemizer: Phonemizer = None
+_worker_pipeline: Pipeline = None
+
+
+def _init_worker(config: PhonemizerConfig):
+    global _worker_phonemizer, _worker_pipeline
+    _worker_phonemizer = Phonemizer()
+    _worker_pipeline = _worker_phonemizer.compile(config)
+
+
+def _phonemize_chunk_in_worker(
+    texts: list[str], return_tokens=False
+) -> list[str | list[Token]]:
+    prefetched = _prefetch_fallback(_worker_phonemizer, texts, _worker_pipeline.config)
+    return [
+        _worker_pipeline.phonemize(text, return_tokens, **prefetched) for text in texts
+    ]
+
+
+def _prefetch_fallback(
+    phonemizer: Phonemizer, texts: list[str], config: PhonemizerConfig
+) -> dict:
+    """
+    Look up all fallback words of the texts at once (one call for BatchFallback),
+    returns the fallback_phonemes and dictionary arguments of Pipeline.phonemize.
+    The results are passed on rather than read back from the fallback cache,
+    which may be smaller than the number of words
+    """
+    if config.fallback is None:
+        return {}
+    dictionary = phonemizer.expander.dictionary
+    fallback_phonemes = phonemizer.fallback_phonemes(
+        texts, config.fallback, config.use_expander, dictionary
+    )
+    return dict(fallback_phonemes=fallback_phonemes, dictionary=dictionary)
+
+
+def _log_throughput(count: int, chars: int, elapsed: float, workers: int):
+    elapsed = max(elapsed, 1e-9)
+    log.info(
+        f"Phonemized {count} texts ({chars} chars) in {elapsed:.2f}s with {workers} workers: "
+        f"{count / elapsed:.1f} texts/s, {chars / elapsed:.0f} chars/s"
+    )
+
+
+def phonemize_batch(
+    texts: Iterable[str],
+    workers: int | None = None,
+    chunksize: int | None = None,
+    preserve_punctuation=True,
+    preserve_stress=True,
+    use_expander=True,
+    use_post_normalize=True,  # For TTS
+    predict_stress=True,
+    predict_vocal_shva=True,
+    schema: Literal["plain", "modern"] | Mapping[str, str] = "modern",
+    fallback: Callable[[str], str] = None,
+) -> list[str]:
+    """
+    Phonemize many texts on a pool of processes, results keep the input order.
+    Each worker creates its own Phonemizer once.
+    Fallback words are looked up once per chunk, use BatchFallback to phonemize them in one call.
+    workers defaults to the number of CPUs, workers=1 runs in the current process.
+    When using workers, fallback must be picklable (eg. module level function).
+    Throughput is logged with LOG_LEVEL=INFO
+    """
+    texts = list(texts)
+    config = PhonemizerConfig(
+        preserve_punctuation=preserve_punctuation,
+        preserve_stress=preserve_stress,
+        use_expander=use_expander,
+        use_post_normalize=use_post_normalize,
+        predict_stress=predict_stress,
+        predict_vocal_shva=predict_vocal_shva,
+        schema=schema,
+        fallback=fallback,
+    )
+    workers = min(workers or os.cpu_count() or 1, max(len(texts), 1))
+    start = time.perf_counter()
+
+    if workers <= 1:
+        from phonikud import phonemizer
+
+        prefetched = _prefetch_fallback(phonemizer, texts, config)
+        pipeline = phonemizer.compile(config)
+        results = [pipeline.phonemize(text, **prefetched) for text in texts]
+    else:
+        if chunksize is None:
+            chunksize = max(1, len(texts) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(config,)
+        ) as executor:
+            chunks = executor.map(_phonemize_chunk_in_worker, _chunks(texts, chunksize))
+            results = [result for chunk in chunks for result in chunk]
+
+    _log_throughput(
+        len(texts), sum(len(t) for t in texts), time.perf_counter() - start, workers
+    )
+    return results
+
+
+def _read_lines(path: str | Path) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+
+def _chunks(texts: Iterable[str], size: int) -> Iterator[list[str]]:
+    it = iter(texts)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def phonemize_stream(
+    source: Iterable[str] | str | Path,
+    workers: int = 1,
+    window: int | None = None,
+    chunksize: int = 64,
+    preserve_punctuation=True,
+    preserve_stress=True,
+    use_expander=True,
+    use_post_normalize=True,  # For TTS
+    predict_stress=True,
+    predict_vocal_shva=True,
+    schema: Literal["plain", "modern"] | Mapping[str, str] = "modern",
+    fallback: Callable[[str], str] = None,
+    return_tokens=False,
+) -> Iterator[str | list[Token]]:
+    """
+    Lazily phonemize texts from an iterable, or lines from a file path.
+    File lines are yielded without the line break, in input order.
+    With workers > 1 chunks of chunksize texts run on a process pool,
+    at most window chunks (default workers * 2) are in flight at once so memory stays bounded.
+    return_tokens=True yields a Token list for every text instead of a string
+    """
+    config = PhonemizerConfig(
+        preserve_punctuation=preserve_punctuation,
+        preserve_stress=preserve_stress,
+        use_expander=use_expander,
+        use_post_normalize=use_post_normalize,
+        predict_stress=predict_stress,
+        predict_vocal_shva=predict_vocal_shva,
+        schema=schema,
+        fallback=fallback,
+    )
+    texts = _read_lines(source) if isinstance(source, (str, Path)) else source
+    count, chars = 0, 0
+    start = time.perf_counter()
+
+    if workers <= 1:
+        from phonikud import phonemizer
+
+        pipeline = phonemizer.compile(config)
+        for text in texts:
+            count, chars = count + 1, chars + len(text)
+            yield pipeline.phonemize(text, return_tokens)
+    else:
+        window = window or workers * 2
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(config,)
+        ) as executor:
+            pending = deque()
+            for chunk in _chunks(texts, chunksize):
+                count, chars = count + len(chunk), chars + sum(len(t) for t in chunk)
+                pending.append(
+                    executor.submit(_phonemize_chunk_in_worker, chunk, return_tokens)
+                )
+                if len(pending) >= window:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    _log_throughput(count, chars, time.perf_counter() - start, workers)
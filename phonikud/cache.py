@@ -0,0 +1,209 @@
+"""
+Caches for phonemized words
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Hashable, NamedTuple
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class LRUCache:
+    """
+    Bounded cache that evicts the least recently used entry, safe to share by threads
+    maxsize=0 disables caching
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.data: OrderedDict[Hashable, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> str | None:
+        with self.lock:
+            value = self.data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: str):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            if len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self.lock:
+            return CacheInfo(
+                self.hits, self.misses, self.evictions, len(self.data), self.maxsize
+            )
+
+    def __len__(self):
+        return len(self.data)
+
+
+# Modules that define how a single word is phonemized, see Phonemizer.phonemize_hebrew_word
+RULES_MODULES = [
+    "hebrew.py",
+    "lexicon.py",
+    "utils.py",
+    "syllables.py",
+    "variants.py",
+    "phonemize.py",
+    "pipeline.py",
+]
+
+
+@lru_cache(maxsize=None)
+def rules_fingerprint() -> str:
+    """
+    Hash of the phonemization rules source, changes whenever the rules change
+    Computed once per process
+    """
+    import hashlib
+
+    package = Path(__file__).parent
+    digest = hashlib.sha256()
+    for name in RULES_MODULES:
+        digest.update(package.joinpath(name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _write_rows(conn, fingerprint: str, pending: dict[str, str]):
+    if not pending:
+        return
+    rows = [(fingerprint, k, v) for k, v in pending.items()]
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT OR REPLACE INTO words (version, key, phonemes) VALUES (?, ?, ?)",
+        rows,
+    )
+    conn.execute("COMMIT")
+    pending.clear()
+
+
+def _close_connection(conn, fingerprint: str, pending: dict[str, str], lock):
+    # Doesn't reference the DiskCache, so that it can be garbage collected
+    with lock:
+        _write_rows(conn, fingerprint, pending)
+        conn.close()
+
+
+class DiskCache:
+    """
+    Persistent word cache in sqlite, can be shared by many processes
+    Entries from other rules versions are dropped on open
+    Writes are buffered and flushed every flush_every entries or flush_interval
+    seconds, and on close() / process exit
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        fingerprint: str = None,
+        flush_every=1000,
+        flush_interval=5.0,
+    ):
+        self.path = Path(path)
+        self.fingerprint = fingerprint or rules_fingerprint()
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+        self.pending: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        # Imported here, most users don't need a disk cache
+        import sqlite3
+        from multiprocessing import util
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(
+            self.path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        # WAL lets readers work while another process writes
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS words "
+            "(version TEXT, key TEXT, phonemes TEXT, PRIMARY KEY (version, key))"
+        )
+        self.conn.execute("DELETE FROM words WHERE version != ?", (self.fingerprint,))
+        # Unlike atexit, also runs when pool worker processes exit, or when the
+        # cache is garbage collected. Runs once
+        self.finalizer = util.Finalize(
+            self,
+            _close_connection,
+            args=(self.conn, self.fingerprint, self.pending, self.lock),
+            exitpriority=10,
+        )
+
+    @staticmethod
+    def make_key(key: tuple) -> str:
+        return "\x1f".join(str(i) for i in key)
+
+    def get(self, key: tuple) -> str | None:
+        key = self.make_key(key)
+        with self.lock:
+            value = self.pending.get(key)
+            if value is None and self.conn is not None:
+                row = self.conn.execute(
+                    "SELECT phonemes FROM words WHERE version = ? AND key = ?",
+                    (self.fingerprint, key),
+                ).fetchone()
+                value = row[0] if row else None
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: str):
+        with self.lock:
+            self.pending[self.make_key(key)] = value
+            if (
+                len(self.pending) >= self.flush_every
+                or time.monotonic() - self.last_flush > self.flush_interval
+            ):
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        self.last_flush = time.monotonic()
+        if self.conn is not None:
+            _write_rows(self.conn, self.fingerprint, self.pending)
+
+    def close(self):
+        with self.lock:
+            self.conn = None
+        # Flushes and closes the connection
+        self.finalizer()
@@ -0,0 +1,207 @@
+"""
+Phonemize files, directories or stdin line by line
+
+phonikud input.txt -o output.txt
+cat input.txt | phonikud --format jsonl --workers 8
+phonikud corpus/ -o phonemes.tsv --format tsv --resume
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterator, TextIO
+
+FORMATS = ["text", "tsv", "jsonl"]
+# Bytes read at a time when counting the lines of a previous output
+CHUNK_SIZE = 1 << 20
+
+
+def load_fallback(spec: str) -> Callable[[str], str]:
+    """
+    Import a fallback from "module:function"
+    """
+    module, _, name = spec.partition(":")
+    if not module or not name:
+        raise ValueError(f"expected module:function, got {spec!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+def input_files(inputs: list[str]) -> list[str | Path]:
+    """
+    Expand directories into their .txt files, "-" is stdin
+    """
+    files = []
+    for name in inputs or ["-"]:
+        path = Path(name)
+        if name != "-" and path.is_dir():
+            files += sorted(p for p in path.rglob("*.txt") if p.is_file())
+        else:
+            files.append(name)
+    return files
+
+
+def read_lines(files: list[str | Path]) -> Iterator[str]:
+    for file in files:
+        if file == "-":
+            for line in sys.stdin:
+                yield line.rstrip("\r\n")
+            continue
+        with open(file, "r", encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\r\n")
+
+
+def completed_lines(path: Path) -> int:
+    """
+    Number of complete lines in a previous output, a partial last line is removed
+    """
+    if not path.exists():
+        return 0
+    count, end, pos = 0, 0, 0
+    with open(path, "rb+") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            newlines = chunk.count(b"\n")
+            if newlines:
+                count += newlines
+                end = pos + chunk.rfind(b"\n") + 1
+            pos += len(chunk)
+        if end != pos:
+            # A partial last line
+            f.truncate(end)
+    return count
+
+
+def format_line(text: str, result, output_format: str) -> str:
+    if output_format == "jsonl":
+        if isinstance(result, list):
+            record = {"text": text, "tokens": [token._asdict() for token in result]}
+        else:
+            record = {"text": text, "phonemes": result}
+        return json.dumps(record, ensure_ascii=False)
+    if output_format == "tsv":
+        return f"{text}\t{result}"
+    return result
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="phonikud",
+        description="Convert Hebrew text with nikud to phonemes, line by line",
+    )
+    parser.add_argument(
+        "inputs", nargs="*", help="Files or directories (*.txt), - or none for stdin"
+    )
+    parser.add_argument("-o", "--output", type=Path, help="Output file, default stdout")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="text")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=1, help="Processes, 0 for all CPUs"
+    )
+    parser.add_argument("--chunksize", type=int, default=64)
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the lines already in --output and append the rest",
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="Print throughput to stderr"
+    )
+
+    options = parser.add_argument_group("phonemize options")
+    options.add_argument("--no-punctuation", action="store_true")
+    options.add_argument("--no-stress", action="store_true")
+    options.add_argument("--no-expander", action="store_true")
+    options.add_argument("--no-post-normalize", action="store_true")
+    options.add_argument("--no-predict-stress", action="store_true")
+    options.add_argument("--no-predict-vocal-shva", action="store_true")
+    options.add_argument("--schema", choices=["modern", "plain"], default="modern")
+    options.add_argument(
+        "--fallback",
+        help="Fallback for non Hebrew words as module:function",
+    )
+    options.add_argument(
+        "--tokens",
+        action="store_true",
+        help="Write tokens with spans instead of phonemes in jsonl output",
+    )
+    args = parser.parse_args(argv)
+    if args.resume and args.output is None:
+        parser.error("--resume requires --output")
+    if args.tokens and args.format != "jsonl":
+        parser.error("--tokens requires --format jsonl")
+    if args.fallback is not None:
+        try:
+            args.fallback = load_fallback(args.fallback)
+        except (ImportError, AttributeError, ValueError) as e:
+            parser.error(f"--fallback {args.fallback}: {e}")
+    return args
+
+
+def run(args: argparse.Namespace, out: TextIO) -> tuple[int, int, int]:
+    """
+    Returns (skipped lines, phonemized lines, phonemized chars)
+    """
+    from phonikud.batch import phonemize_stream
+
+    skipped = completed_lines(args.output) if args.resume else 0
+    lines = islice(read_lines(input_files(args.inputs)), skipped, None)
+    # Source lines in flight, results come back in the same order
+    pending = deque()
+
+    def source() -> Iterator[str]:
+        for line in lines:
+            pending.append(line)
+            yield line
+
+    results = phonemize_stream(
+        source(),
+        workers=args.workers or os.cpu_count() or 1,
+        chunksize=args.chunksize,
+        preserve_punctuation=not args.no_punctuation,
+        preserve_stress=not args.no_stress,
+        use_expander=not args.no_expander,
+        use_post_normalize=not args.no_post_normalize,
+        predict_stress=not args.no_predict_stress,
+        predict_vocal_shva=not args.no_predict_vocal_shva,
+        schema=args.schema,
+        fallback=args.fallback,
+        return_tokens=args.tokens,
+    )
+    count, chars = 0, 0
+    for result in results:
+        text = pending.popleft()
+        out.write(format_line(text, result, args.format) + "\n")
+        count, chars = count + 1, chars + len(text)
+    return skipped, count, chars
+
+
+def main(argv: list[str] = None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    if args.output:
+        with open(args.output, "a" if args.resume else "w", encoding="utf-8") as out:
+            skipped, count, chars = run(args, out)
+    else:
+        try:
+            skipped, count, chars = run(args, sys.stdout)
+        except BrokenPipeError:
+            # eg. piped to head, don't print a traceback on exit
+            sys.stdout = None
+            return
+    if args.stats:
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(
+            f"Phonemized {count} lines ({chars} chars) in {elapsed:.2f}s: "
+            f"{count / elapsed:.1f} lines/s, {chars / elapsed:.0f} chars/s"
+            + (f", skipped {skipped} done lines" if skipped else ""),
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
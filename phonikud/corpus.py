@@ -0,0 +1,274 @@
+"""
+Resumable corpus jobs
+
+Input files are memory mapped and split into byte range shards that end on line
+boundaries. Shards run on a process pool and each one is written to its own output
+file, a manifest in the output directory records the completed shards so an
+interrupted job continues from where it stopped.
+
+output_dir/
+    manifest.json
+    00000.txt  phonemes of shard 0, one line per input line
+    00001.txt
+"""
+
+import functools
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Literal, Mapping, NamedTuple
+from phonikud import batch
+from phonikud.fallback import BatchFallback
+from phonikud.log import log
+from phonikud.phonemize import Phonemizer
+from phonikud.pipeline import Pipeline, PhonemizerConfig
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+DEFAULT_SHARD_SIZE = 4 * 1024 * 1024  # Bytes
+
+
+class Shard(NamedTuple):
+    index: int
+    source: str
+    start: int  # Byte offsets in source, start of a line to the end of a line
+    end: int
+
+    @property
+    def output(self) -> str:
+        return f"{self.index:05d}.txt"
+
+
+def plan_shards(files: Iterable[str | Path], shard_size: int) -> list[Shard]:
+    """
+    Split files into shards of about shard_size bytes, aligned to line breaks
+    """
+    shards = []
+    for file in files:
+        size = os.path.getsize(file)
+        if size == 0:
+            continue  # Can't mmap an empty file
+        with open(file, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            start = 0
+            while start < size:
+                newline = mm.find(b"\n", min(start + shard_size, size) - 1)
+                end = size if newline == -1 else newline + 1
+                shards.append(Shard(len(shards), str(file), start, end))
+                start = end
+    return shards
+
+
+def read_shard(shard: Shard) -> list[str]:
+    """
+    Lines of a shard without the line breaks
+    """
+    with open(shard.source, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        text = mm[shard.start : shard.end].decode("utf-8")
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()  # Shards end with a line break, except maybe the last one
+    return [line.rstrip("\r") for line in lines]
+
+
+def _process_shard(
+    shard: Shard,
+    output_dir: Path,
+    phonemizer: Phonemizer,
+    pipeline: Pipeline,
+) -> tuple[int, int, int]:
+    lines = read_shard(shard)
+    prefetched = batch._prefetch_fallback(phonemizer, lines, pipeline.config)
+    path = output_dir / shard.output
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(pipeline.phonemize(line, **prefetched) + "\n")
+    # Atomic, a shard file is either complete or missing
+    os.replace(tmp, path)
+    return shard.index, len(lines), sum(len(line) for line in lines)
+
+
+def _process_shard_in_worker(shard: Shard, output_dir: Path) -> tuple[int, int, int]:
+    return _process_shard(
+        shard, output_dir, batch._worker_phonemizer, batch._worker_pipeline
+    )
+
+
+def _fallback_identity(fallback: Callable) -> str:
+    """
+    Identity of a fallback that is the same on every run, eg. "my_module:espeak".
+    BatchFallback and functools.partial are unwrapped to the function they call
+    """
+    name = ""
+    while True:
+        if isinstance(fallback, BatchFallback):
+            name += "BatchFallback:"
+            fallback = fallback.batch
+        elif isinstance(fallback, functools.partial):
+            arguments = repr((fallback.args, fallback.keywords))
+            if " at 0x" in arguments:
+                raise ValueError(
+                    f"Can't identify the fallback arguments {arguments}, pass fallback_name"
+                )
+            name += f"partial{arguments}:"
+            fallback = fallback.func
+        else:
+            break
+    if not hasattr(fallback, "__qualname__"):
+        fallback = type(fallback)  # Callable object
+    # Methods of builtin types (eg. str.upper) have the module of their class
+    module = getattr(fallback, "__module__", None) or getattr(
+        getattr(fallback, "__objclass__", None), "__module__", None
+    )
+    if module is None:
+        raise ValueError(
+            f"Can't identify the fallback {fallback!r}, pass fallback_name"
+        )
+    return f"{name}{module}:{fallback.__qualname__}"
+
+
+def _fingerprint(
+    files: list[str | Path],
+    config: PhonemizerConfig,
+    shard_size: int,
+    fallback: str | None = None,
+) -> dict:
+    # Everything the shard outputs depend on, the job restarts if any of it changed
+    sources = []
+    for file in files:
+        stat = os.stat(file)
+        sources.append([str(Path(file).resolve()), stat.st_mtime_ns, stat.st_size])
+    if fallback is None and config.fallback is not None:
+        fallback = _fallback_identity(config.fallback)
+    return {
+        "version": MANIFEST_VERSION,
+        "sources": sources,
+        "shard_size": shard_size,
+        "options": {**config._asdict(), "fallback": fallback},
+    }
+
+
+def load_manifest(output_dir: str | Path) -> dict | None:
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_manifest(output_dir: Path, manifest: dict):
+    path = output_dir / MANIFEST_NAME
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def phonemize_corpus(
+    files: Iterable[str | Path],
+    output_dir: str | Path,
+    workers: int | None = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    preserve_punctuation=True,
+    preserve_stress=True,
+    use_expander=True,
+    use_post_normalize=True,  # For TTS
+    predict_stress=True,
+    predict_vocal_shva=True,
+    schema: Literal["plain", "modern"] | Mapping[str, str] = "modern",
+    fallback: Callable[[str], str] = None,
+    fallback_name: str = None,
+) -> dict:
+    """
+    Phonemize text files line by line into shard files in output_dir, returns the manifest.
+    Completed shards are skipped when the job runs again with the same files and options,
+    any change starts it over.
+    fallback_name: identifies the fallback between runs, defaults to its module and name,
+        see _fallback_identity
+    workers defaults to the number of CPUs, workers=1 runs in the current process.
+    Use read_corpus to iterate the results in input order.
+    """
+    files = list(files)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    config = PhonemizerConfig(
+        preserve_punctuation=preserve_punctuation,
+        preserve_stress=preserve_stress,
+        use_expander=use_expander,
+        use_post_normalize=use_post_normalize,
+        predict_stress=predict_stress,
+        predict_vocal_shva=predict_vocal_shva,
+        schema=schema,
+        fallback=fallback,
+    )
+    fingerprint = _fingerprint(files, config, shard_size, fallback_name)
+    manifest = load_manifest(output_dir)
+    if manifest is None or manifest.get("job") != fingerprint:
+        if manifest is not None:
+            log.info(f"Inputs or options changed, restarting the job in {output_dir}")
+        shards = plan_shards(files, shard_size)
+        manifest = {
+            "job": fingerprint,
+            "shards": [
+                {**s._asdict(), "output": s.output, "lines": None} for s in shards
+            ],
+        }
+        _save_manifest(output_dir, manifest)
+
+    todo = [
+        Shard(s["index"], s["source"], s["start"], s["end"])
+        for s in manifest["shards"]
+        if s["lines"] is None or not (output_dir / s["output"]).exists()
+    ]
+    log.info(f"{len(manifest['shards']) - len(todo)} shards done, {len(todo)} to go")
+    workers = min(workers or os.cpu_count() or 1, max(len(todo), 1))
+    count, chars = 0, 0
+    start = time.perf_counter()
+
+    def completed(index: int, lines: int, shard_chars: int):
+        nonlocal count, chars
+        count, chars = count + lines, chars + shard_chars
+        manifest["shards"][index]["lines"] = lines
+        _save_manifest(output_dir, manifest)
+
+    if workers <= 1:
+        from phonikud import phonemizer
+
+        pipeline = phonemizer.compile(config)
+        for shard in todo:
+            completed(*_process_shard(shard, output_dir, phonemizer, pipeline))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=batch._init_worker, initargs=(config,)
+        ) as executor:
+            futures = [
+                executor.submit(_process_shard_in_worker, shard, output_dir)
+                for shard in todo
+            ]
+            for future in as_completed(futures):
+                completed(*future.result())
+
+    batch._log_throughput(count, chars, time.perf_counter() - start, workers)
+    return manifest
+
+
+def read_corpus(output_dir: str | Path) -> Iterator[str]:
+    """
+    Phonemes of a completed phonemize_corpus job, one per input line in input order
+    """
+    output_dir = Path(output_dir)
+    manifest = load_manifest(output_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No {MANIFEST_NAME} in {output_dir}")
+    for shard in manifest["shards"]:
+        if shard["lines"] is None:
+            raise RuntimeError(f"Shard {shard['index']} isn't done, run the job again")
+        with open(output_dir / shard["output"], "r", encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\n")
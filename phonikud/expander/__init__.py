@@ -8,13 +8,125 @@ from .dates import date_to_word
 from .time_to_word import time_to_word
 from .dictionary import Dictionary
 from phonikud.log import log
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, NamedTuple
+import os
+import threading
+import time
+
+
+class ReloadEvent(NamedTuple):
+    sources: list[Path]
+    entries: int  # Of the dictionary in use after the reload
+    seconds: float
+    error: Exception | None  # The old dictionary is kept if loading failed
 
 
 class Expander:
-    def __init__(self):
-        self.dictionary = Dictionary()
+    def __init__(
+        self,
+        reload_interval: float = None,
+        use_hash: bool = False,
+        on_reload: Callable[[ReloadEvent], None] = None,
+    ):
+        """
+        reload_interval: seconds between checks for changed dictionary files in a
+            background thread, see reload. Defaults to PHONIKUD_RELOAD_INTERVAL, or no checks
+        use_hash: detect changed files by content instead of mtime and size
+        on_reload: called after every reload, from the thread that reloaded
+        """
+        self.use_hash = use_hash
+        self.reload_callbacks: list[Callable[[ReloadEvent], None]] = []
+        if on_reload is not None:
+            self.reload_callbacks.append(on_reload)
+        self.reload_count = 0
+        self.reload_lock = threading.Lock()
+        self.watcher: threading.Thread | None = None
+        self.stop_watching = threading.Event()
+        if reload_interval is None:
+            reload_interval = float(os.getenv("PHONIKUD_RELOAD_INTERVAL", "0"))
+        if reload_interval > 0:
+            self.watch(reload_interval)
+
+    @cached_property
+    def dictionary(self) -> Dictionary:
+        # Loaded on first use
+        return Dictionary(use_hash=self.use_hash)
+
+    def reload(self, force=False) -> bool:
+        """
+        Load the dictionary again if its files changed, returns whether it was replaced.
+        The new dictionary is swapped in at once, calls in flight keep the one they started with
+        """
+        with self.reload_lock:
+            if "dictionary" not in self.__dict__:
+                # Not loaded yet, the current files are loaded on first use
+                return False
+            current: Dictionary = self.__dict__["dictionary"]
+            if not force and not current.changed():
+                return False
+            start = time.perf_counter()
+            try:
+                dictionary = current.reload()
+            except Exception as e:
+                # eg. a file that's being written, the next check retries
+                log.error(f"Failed to reload dictionaries with error: {e}")
+                dictionary, error = current, e
+            else:
+                self.dictionary = dictionary
+                self.reload_count += 1
+                error = None
+            event = ReloadEvent(
+                current.sources(),
+                len(dictionary.dict) + sum(map(len, dictionary.lexicons)),
+                time.perf_counter() - start,
+                error,
+            )
+        log.debug(f"Reloaded dictionaries: {event}")
+        for callback in self.reload_callbacks:
+            callback(event)
+        return error is None
 
-    def expand_text(self, text: str):
+    def watch(self, interval: float = 2.0):
+        """
+        Check for changed dictionary files every interval seconds in a daemon thread
+        """
+        self.unwatch()
+        self.stop_watching = stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    log.error(f"Dictionary watcher failed with error: {e}")
+
+        self.watcher = threading.Thread(
+            target=run, name="phonikud-dictionary-watcher", daemon=True
+        )
+        self.watcher.start()
+
+    def unwatch(self):
+        self.stop_watching.set()
+        if self.watcher is not None:
+            self.watcher.join()
+            self.watcher = None
+
+    def expand_text(self, text: str, expand_numbers=True):
+        """
+        expand_numbers=False skips dates, times and numbers, for text without digits
+        """
+        if expand_numbers:
+            text = self.expand_numbers(text)
+        else:
+            text = " ".join(text.split())
+        return self.dictionary.expand_text(text)
+
+    def expand_numbers(self, text: str) -> str:
+        """
+        Expand dates, times and numbers, words are joined with single spaces
+        """
         words = []
         for source_word in text.split():
             try:
@@ -27,7 +139,4 @@ class Expander:
             except Exception as e:
                 log.error(f"Failed to expand {word} with error: {e}")
                 words.append(source_word)
-        text = " ".join(words)
-        text = self.dictionary.expand_text(text)
-
-        return text
+        return " ".join(words)
@@ -8,43 +8,160 @@ import re
 from phonikud.utils import remove_nikud
 from phonikud.utils import normalize
 from phonikud import lexicon
+from phonikud.expander import snapshot
+from phonikud.expander.phrases import PhraseMatcher, Phrases
+from phonikud.expander.lexicon_file import Lexicon
+import hashlib
+import os
 import unicodedata
 
-files = Path(__file__).parent.joinpath("../data").glob("*.json")
+data_path = Path(__file__).parent.joinpath("../data")
+_whitespace_pattern = re.compile(r"(\s+)")
 # Sort in reverse order to prioritize the most recent and best
 order = {"bronze": 1, "silver": 2, "gold": 3}
-files = sorted(
-    files, key=lambda f: order.get(next((x for x in order if x in f.stem), ""), 0)
-)
+
+
+def dictionary_files() -> list[Path]:
+    return sorted(
+        data_path.glob("*.json"),
+        key=lambda f: order.get(next((x for x in order if x in f.stem), ""), 0),
+    )
+
+
+def load_json_sources(files: list[Path]) -> dict[str, str]:
+    """
+    Entries of JSON dictionaries with normalized keys, later files take priority
+    """
+    entries = {}
+    for file in files:
+        with open(file, "r", encoding="utf-8") as f:
+            dictionary: dict = json.load(f)
+            normalized_dictionary = {}
+
+            # normalize nikud keys
+            for k, v in dictionary.items():
+                # Words of phrases are separated by a single space
+                k = " ".join(normalize(k).split())
+                # Ensure not empty
+                if k and v:
+                    normalized_dictionary[k] = v
+            entries.update(normalized_dictionary)
+    return entries
+
+
+def source_stamps(paths: list[Path], use_hash: bool = False) -> tuple:
+    """
+    Changes whenever one of the files changes, by mtime and size or by content
+    """
+    stamps = []
+    for path in paths:
+        try:
+            if use_hash:
+                stamps.append(hashlib.sha256(path.read_bytes()).hexdigest())
+            else:
+                stat = path.stat()
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamps.append(None)  # Missing
+    return tuple(stamps)
 
 
 class Dictionary:
-    def __init__(self):
+    def __init__(
+        self,
+        files: list[Path] = None,
+        use_snapshot: bool = None,
+        lexicons: list[Path] = None,
+        use_hash: bool = False,
+        refresh_snapshot: bool = False,
+    ):
+        """
+        files: JSON dictionaries, later files take priority. Defaults to phonikud/data
+        use_snapshot: load from a compiled snapshot in the cache directory, rebuilt
+            when the files change. Defaults to PHONIKUD_SNAPSHOT, or true for large
+            files, see snapshot.snapshot_enabled
+        lexicons: memory mapped lexicon files, see compile_lexicon. They take priority
+            over files, later lexicons first. Defaults to PHONIKUD_LEXICONS, paths
+            separated by os.pathsep
+        use_hash: detect changed sources by their content instead of mtime and size
+        refresh_snapshot: rebuild the snapshot from the files even if it isn't stale
+        A dictionary doesn't change once loaded, see reload
+        """
+        self.files = dictionary_files() if files is None else [Path(f) for f in files]
+        if use_snapshot is None:
+            use_snapshot = snapshot.snapshot_enabled(self.files)
+        self.use_snapshot = use_snapshot
+        if lexicons is None:
+            lexicons = os.getenv("PHONIKUD_LEXICONS", "").split(os.pathsep)
+        self.lexicon_paths = [Path(path) for path in lexicons if path]
+        self.use_hash = use_hash
+        # Before loading, so that changes made while loading are seen by changed()
+        self.stamps = source_stamps(self.sources(), use_hash)
+        self.lexicons = [Lexicon(path) for path in self.lexicon_paths][::-1]
         self.dict = {}
-        self.load_dictionaries()
-
-    def load_dictionaries(self):
-        for file in files:
-            with open(file, "r", encoding="utf-8") as f:
-                dictionary: dict = json.load(f)
-                normalized_dictionary = {}
-
-                # normalize nikud keys
-                for k, v in dictionary.items():
-                    k = normalize(k)
-                    # Ensure not empty
-                    if k and v:
-                        normalized_dictionary[k] = v
-                self.dict.update(normalized_dictionary)
+        self.load_dictionaries(refresh_snapshot)
+        # Keys may have many words, eg. names or idioms
+        self.phrases = PhraseMatcher(tuple(key.split()) for key in self.dict)
+        if self.lexicons:
+            # Lexicon phrases are matched in their files
+            self.phrases = Phrases([self.phrases, *self.lexicons])
+
+    def sources(self) -> list[Path]:
+        return self.files + self.lexicon_paths
+
+    def changed(self) -> bool:
+        """
+        Whether the sources changed since the dictionary was loaded
+        """
+        return source_stamps(self.sources(), self.use_hash) != self.stamps
+
+    def reload(self) -> "Dictionary":
+        """
+        A new dictionary loaded from the current sources, this one is left as is
+        """
+        return Dictionary(
+            self.files,
+            self.use_snapshot,
+            self.lexicon_paths,
+            self.use_hash,
+            # Content may change without changing the snapshot header
+            refresh_snapshot=self.use_hash,
+        )
+
+    def get(self, key: str) -> str | None:
+        """
+        Value of a key in the lexicons or the dictionary
+        """
+        for lexicon_file in self.lexicons:
+            value = lexicon_file.get(key)
+            if value:
+                return value
+        return self.dict.get(key)
+
+    def load_dictionaries(self, refresh_snapshot: bool = False):
+        if not self.use_snapshot:
+            self.load_sources()
+            return
+        header = snapshot.snapshot_header(self.files)
+        path = snapshot.snapshot_path(self.files)
+        dictionary = None if refresh_snapshot else snapshot.load_snapshot(path, header)
+        if dictionary is None:
+            self.load_sources()
+            snapshot.save_snapshot(path, header, self.dict)
+        else:
+            self.dict = dictionary
+
+    def load_sources(self):
+        self.dict.update(load_json_sources(self.files))
 
     def replace_hebrew_only_callback(self, match: re.Match[str]) -> str:
         source: str = match.group(0)
         # decomposite
         source = unicodedata.normalize("NFD", source)
-        raw_lookup = self.dict.get(source)
+        raw_lookup = self.get(source)
 
-        without_nikud_lookup = self.dict.get(remove_nikud(source))
-        with_nikud_lookup = self.dict.get(normalize(source))
+        without_nikud_lookup = self.get(remove_nikud(source))
+        with_nikud_lookup = self.get(normalize(source))
         # Compare without nikud ONLY if source has no nikud
         if raw_lookup:
             return raw_lookup
@@ -54,26 +171,56 @@ class Dictionary:
             return with_nikud_lookup
         return source
 
-    def replace_non_whitespace_callback(self, match: re.Match[str]) -> str:
-        raw_source: str = match.group(0)
-        if raw_source.isnumeric():
-            return raw_source
-
-        raw_lookup = self.dict.get(raw_source)
-
-        # Compare without nikud ONLY if source has no nikud
-        if raw_lookup:
-            return raw_lookup
+    def replace_word(self, word: str) -> str:
+        """
+        A single word, the whole word or its Hebrew parts may be keys
+        """
+        if word.isnumeric():
+            return word
+        # Lexicon keys of a single word aren't phrase matches
+        value = self.get(word)
+        if value:
+            return value
         # search by only ', space, regular nikud, alphabet
-        raw_source = re.sub(
-            lexicon.HE_PATTERN, self.replace_hebrew_only_callback, raw_source
-        )
-        return raw_source
+        return re.sub(lexicon.HE_PATTERN, self.replace_hebrew_only_callback, word)
 
     def expand_text(self, text: str) -> str:
         """
+        Replace keys in one pass, the longest key wins when keys overlap
+        Keys of many words match whole whitespace separated words only
         TODO: if key doesn't have diacritics expand even diacritized words
         """
-        text = re.sub(r"\S+", self.replace_non_whitespace_callback, text)
+        if [text] == text.split():
+            # A single word, eg. a unit of the pipeline
+            return self.replace_word(text)
+        # Words at even indices, whitespace at odd indices
+        parts = _whitespace_pattern.split(text)
+        words = parts[::2]
+        result, pos = [], 0
+        for start, end in self.phrases.find(words):
+            if end - start == 1 and words[start].isnumeric():
+                continue  # Numbers are kept as is
+            for i in range(pos, start):
+                result += [self.replace_word(words[i]), parts[2 * i + 1]]
+            result.append(self.get(" ".join(words[start:end])))
+            # Whitespace inside the phrase is replaced too
+            if 2 * end - 1 < len(parts):
+                result.append(parts[2 * end - 1])
+            pos = end
+        for i in range(pos, len(words)):
+            result.append(self.replace_word(words[i]))
+            if 2 * i + 1 < len(parts):
+                result.append(parts[2 * i + 1])
+        return "".join(result)
+
 
-        return text
+def compile_snapshot(files: list[Path] = None) -> Path:
+    """
+    Build the dictionary snapshot ahead of time (eg. when building a Docker image)
+    Returns the snapshot path, see PHONIKUD_CACHE_DIR
+    """
+    dictionary = Dictionary(files, use_snapshot=False)
+    path = snapshot.snapshot_path(dictionary.files)
+    header = snapshot.snapshot_header(dictionary.files)
+    snapshot.save_snapshot(path, header, dictionary.dict)
+    return path
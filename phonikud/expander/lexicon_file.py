@@ -0,0 +1,262 @@
+"""
+Read only lexicon files for large dictionaries
+
+A lexicon is compiled once from the JSON dictionary format and memory mapped, so
+processes share it through the page cache instead of each one building a dict.
+
+uv run python -m phonikud.expander.lexicon_file words.json -o words.phlex
+
+Layout, integers are 64 bit in the byte order of the machine that compiled it:
+    header      magic, version, byte order, count, phrase count, slots,
+                first words count, first words slots, most words in a key, pool size
+    keys        count + 1 offsets into the pool, keys are sorted by UTF-8 bytes
+    values      count + 1 offsets into the pool
+    phrases     indices of keys with more than one word
+    table       hash table of slots, key index + 1 or 0 for an empty slot
+    first words (pool offset, length, most words) of the first word of the phrases
+    first table hash table of first words slots, first word index + 1 or 0
+    pool        UTF-8 keys and values
+
+Phrases are matched through the first words table, nothing is built in memory.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+from typing import Iterator
+
+MAGIC = b"PHNKLEX\0"
+VERSION = 2
+_HEADER = struct.Struct("<8sII7Q")
+_BYTE_ORDER = {"little": 1, "big": 2}
+
+
+def _slots(count: int) -> int:
+    # Power of two with at most half of the slots used
+    return 1 << max(count * 2 - 1, 1).bit_length()
+
+
+def _hash_table(keys: list[bytes]) -> array:
+    # Open addressing with linear probing, index + 1 of every key
+    slots = _slots(len(keys))
+    table = array("Q", bytes(8 * slots))
+    for i, key in enumerate(keys):
+        slot = zlib.crc32(key) & (slots - 1)
+        while table[slot]:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = i + 1
+    return table
+
+
+def compile_lexicon(files: list[str | Path], output: str | Path) -> Path:
+    """
+    Compile JSON dictionaries into a lexicon file, later files take priority
+    Keys are normalized the same way as Dictionary does
+    """
+    from phonikud.expander.dictionary import load_json_sources
+
+    entries = sorted(
+        (key.encode("utf-8"), value.encode("utf-8"))
+        for key, value in load_json_sources([Path(f) for f in files]).items()
+    )
+    count = len(entries)
+    keys, values = array("Q", [0]), array("Q", [0])
+    pool = bytearray()
+    for key, _ in entries:
+        pool += key
+        keys.append(len(pool))
+    values[0] = len(pool)
+    for _, value in entries:
+        pool += value
+        values.append(len(pool))
+    phrases = array("Q", [i for i, (key, _) in enumerate(entries) if b" " in key])
+    # First word -> (pool offset, length, most words of its phrases)
+    firsts: dict[bytes, list[int]] = {}
+    for i in phrases:
+        key = entries[i][0]
+        first = key[: key.index(b" ")]
+        words = key.count(b" ") + 1
+        entry = firsts.setdefault(first, [keys[i], len(first), words])
+        entry[2] = max(entry[2], words)
+    first_words = array("Q", [n for entry in firsts.values() for n in entry])
+
+    table = _hash_table([key for key, _ in entries])
+    first_table = _hash_table(list(firsts))
+
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        _BYTE_ORDER[sys.byteorder],
+        count,
+        len(phrases),
+        len(table),
+        len(firsts),
+        len(first_table),
+        max((entry[2] for entry in firsts.values()), default=1 if count else 0),
+        len(pool),
+    )
+    output = Path(output)
+    tmp = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        for part in (
+            header,
+            keys,
+            values,
+            phrases,
+            table,
+            first_words,
+            first_table,
+            pool,
+        ):
+            f.write(part)
+    os.replace(tmp, output)
+    return output
+
+
+class Lexicon:
+    """
+    Memory mapped lexicon file, see compile_lexicon
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"{self.path} is not a phonikud lexicon")
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            byte_order,
+            count,
+            phrases,
+            slots,
+            firsts,
+            first_slots,
+            max_length,
+            _,
+        ) = _HEADER.unpack_from(self.mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a phonikud lexicon v{VERSION}")
+        if byte_order != _BYTE_ORDER[sys.byteorder]:
+            raise ValueError(f"{self.path} was compiled on another byte order")
+        self.count = count
+        self.mask = slots - 1
+        self.first_mask = first_slots - 1
+        # Most words in a key, see phrases.PhraseMatcher
+        self.max_length = max_length
+        words = memoryview(self.mmap).cast("B")
+        pos = _HEADER.size
+
+        def take(length: int) -> memoryview:
+            nonlocal pos
+            part = words[pos : pos + 8 * length].cast("Q")
+            pos += 8 * length
+            return part
+
+        self.keys = take(count + 1)
+        self.values = take(count + 1)
+        self.phrase_indices = take(phrases)
+        self.table = take(slots)
+        self.first_words = take(3 * firsts)
+        self.first_table = take(first_slots)
+        self.pool_start = pos
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _key(self, i: int) -> bytes:
+        start = self.pool_start
+        return self.mmap[start + self.keys[i] : start + self.keys[i + 1]]
+
+    def _value(self, i: int) -> str:
+        start = self.pool_start
+        value = self.mmap[start + self.values[i] : start + self.values[i + 1]]
+        return value.decode("utf-8")
+
+    def get(self, key: str, default: str = None) -> str | None:
+        data = key.encode("utf-8")
+        table, mask = self.table, self.mask
+        slot = zlib.crc32(data) & mask
+        while index := table[slot]:
+            if self._key(index - 1) == data:
+                return self._value(index - 1)
+            slot = (slot + 1) & mask
+        return default
+
+    def _phrase_length(self, word: str) -> int:
+        # Most words of the phrases that start with word, 0 if none do
+        data = word.encode("utf-8")
+        table, mask, first_words = self.first_table, self.first_mask, self.first_words
+        start = self.pool_start
+        slot = zlib.crc32(data) & mask
+        while index := table[slot]:
+            offset, length, words = first_words[3 * index - 3 : 3 * index]
+            if self.mmap[start + offset : start + offset + length] == data:
+                return words
+            slot = (slot + 1) & mask
+        return 0
+
+    def longest(self, words: list[str | None]) -> list[int]:
+        """
+        Words in the longest phrase key that starts at each word, 0 if none.
+        Keys of a single word aren't matched, None matches nothing
+        """
+        longest = [0] * len(words)
+        for i, word in enumerate(words):
+            if word is None:
+                continue
+            for length in range(min(self._phrase_length(word), len(words) - i), 1, -1):
+                phrase = words[i : i + length]
+                if None not in phrase and " ".join(phrase) in self:
+                    longest[i] = length
+                    break
+        return longest
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Keys in sorted order
+        """
+        for i in range(self.count):
+            yield self._key(i).decode("utf-8")
+
+    def phrases(self) -> Iterator[str]:
+        """
+        Keys with more than one word
+        """
+        for i in self.phrase_indices:
+            yield self._key(i).decode("utf-8")
+
+    def close(self):
+        for view in (
+            self.keys,
+            self.values,
+            self.phrase_indices,
+            self.table,
+            self.first_words,
+            self.first_table,
+        ):
+            view.release()
+        self.mmap.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("files", nargs="+", type=Path, help="JSON dictionaries")
+    parser.add_argument("-o", "--output", type=Path, required=True)
+    args = parser.parse_args()
+    path = compile_lexicon(args.files, args.output)
+    print(f"Compiled {len(Lexicon(path))} entries into {path}")
+
+
+if __name__ == "__main__":
+    main()
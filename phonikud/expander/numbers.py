@@ -1,4 +1,3 @@
-import num2words
 from .number_names import NUMBER_NAMES
 import re
 
@@ -17,6 +16,8 @@ def add_diacritics(words: str):
 
 
 def num_to_word(maybe_number: str) -> str:
+    import num2words  # Slow to import, only needed for numbers
+
     def replace_number(match):
         num: str = match.group()
         suffix, prefix = "", ""
@@ -0,0 +1,105 @@
+"""
+Aho-Corasick automaton over words, finds dictionary keys of one or more words
+in a single pass over the text
+See https://en.wikipedia.org/wiki/Aho%E2%80%93Corasick_algorithm
+"""
+
+from collections import deque
+from typing import Iterable
+
+
+class PhraseMatcher:
+    def __init__(self, phrases: Iterable[tuple[str, ...]]):
+        """
+        phrases: keys as word tuples, eg. ("בית", "ספר")
+        """
+        # State 0 is the root, goto[state][word] -> next state
+        self.goto: list[dict[str, int]] = [{}]
+        # Lengths of the phrases that end in each state, longest first
+        self.out: list[tuple[int, ...]] = [()]
+        self.fail: list[int] = [0]
+        self.max_length = 0
+        for phrase in phrases:
+            self.add(phrase)
+        self.build()
+
+    def add(self, phrase: tuple[str, ...]):
+        state = 0
+        for word in phrase:
+            next_state = self.goto[state].get(word)
+            if next_state is None:
+                next_state = self.goto[state][word] = len(self.goto)
+                self.goto.append({})
+                self.out.append(())
+                self.fail.append(0)
+            state = next_state
+        self.out[state] = (len(phrase),)
+        self.max_length = max(self.max_length, len(phrase))
+
+    def build(self):
+        # Breadth first, failure links point to the longest proper suffix state
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and word not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(word, 0)
+                self.out[next_state] += self.out[self.fail[next_state]]
+
+    def longest(self, words: list[str]) -> list[int]:
+        """
+        Words in the longest phrase that starts at each word, 0 if none
+        """
+        goto, fail, out = self.goto, self.fail, self.out
+        longest = [0] * len(words)
+        state = 0
+        for end, word in enumerate(words, 1):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for length in out[state]:
+                start = end - length
+                if length > longest[start]:
+                    longest[start] = length
+        return longest
+
+    def find(self, words: list[str]) -> list[tuple[int, int]]:
+        """
+        Leftmost longest non overlapping matches as (start, end) word indices
+        """
+        return select(self.longest(words))
+
+
+class Phrases:
+    """
+    Matches of several phrase sets as one, eg. a PhraseMatcher and lexicon files
+    matchers: objects with max_length and longest(words) like PhraseMatcher
+    """
+
+    def __init__(self, matchers: list):
+        self.matchers = matchers
+        self.max_length = max((m.max_length for m in matchers), default=0)
+
+    def find(self, words: list[str]) -> list[tuple[int, int]]:
+        longest = [0] * len(words)
+        for matcher in self.matchers:
+            if matcher.max_length:
+                longest = list(map(max, longest, matcher.longest(words)))
+        return select(longest)
+
+
+def select(longest: list[int]) -> list[tuple[int, int]]:
+    """
+    Leftmost longest non overlapping (start, end) matches, see PhraseMatcher.longest
+    """
+    matches, i = [], 0
+    while i < len(longest):
+        if longest[i]:
+            matches.append((i, i + longest[i]))
+            i += longest[i]
+        else:
+            i += 1
+    return matches
@@ -0,0 +1,91 @@
+"""
+Compiled dictionary snapshots
+
+The JSON dictionaries are normalized once and saved as a single marshal file in the
+cache directory, later starts load it with one read. A snapshot is rebuilt when the
+source files, the normalization rules or the Python version change.
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+from pathlib import Path
+from phonikud.cache import rules_fingerprint
+from phonikud.log import log
+
+SNAPSHOT_VERSION = 2
+# Smaller sources load faster from JSON than from a snapshot
+SNAPSHOT_MIN_SIZE = 64 * 1024  # Bytes
+
+
+def cache_dir() -> Path:
+    """
+    PHONIKUD_CACHE_DIR, defaults to ~/.cache/phonikud
+    """
+    path = os.getenv("PHONIKUD_CACHE_DIR")
+    if path:
+        return Path(path)
+    return Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "phonikud"
+
+
+def snapshot_enabled(files: list[Path]) -> bool:
+    """
+    PHONIKUD_SNAPSHOT=1 / 0 turns snapshots on / off, by default only large
+    sources are snapshotted, see SNAPSHOT_MIN_SIZE
+    """
+    enabled = os.getenv("PHONIKUD_SNAPSHOT")
+    if enabled is not None:
+        return enabled != "0"
+    return sum(file.stat().st_size for file in files) >= SNAPSHOT_MIN_SIZE
+
+
+def snapshot_header(files: list[Path]) -> tuple:
+    """
+    Everything a snapshot depends on, it's stale if any of it changed
+    """
+    sources = []
+    for file in files:
+        stat = file.stat()
+        sources.append((str(file.resolve()), stat.st_mtime_ns, stat.st_size))
+    # marshal format may change between Python versions
+    return (SNAPSHOT_VERSION, sys.version, rules_fingerprint(), tuple(sources))
+
+
+def snapshot_path(files: list[Path], directory: Path = None) -> Path:
+    """
+    One snapshot per set of source files
+    """
+    names = "\n".join(str(file.resolve()) for file in files)
+    digest = hashlib.sha256(names.encode("utf-8")).hexdigest()[:16]
+    return (directory or cache_dir()) / f"dictionary-{digest}.marshal"
+
+
+def load_snapshot(path: Path, header: tuple) -> dict[str, str] | None:
+    """
+    The snapshot dictionary, or None if it's missing or stale
+    """
+    try:
+        snapshot_header, dictionary = marshal.loads(path.read_bytes())
+    except (OSError, ValueError, EOFError, TypeError) as e:
+        log.debug(f"Can't load dictionary snapshot {path}: {e}")
+        return None
+    if snapshot_header != header:
+        log.debug(f"Dictionary snapshot {path} is stale")
+        return None
+    return dictionary
+
+
+def save_snapshot(path: Path, header: tuple, dictionary: dict[str, str]):
+    """
+    Write the snapshot atomically, concurrent readers see the old or new file
+    """
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(marshal.dumps((header, dictionary)))
+        os.replace(tmp, path)
+    except OSError as e:
+        # Read only cache directory, we'll load the sources next time too
+        log.debug(f"Can't save dictionary snapshot {path}: {e}")
+        tmp.unlink(missing_ok=True)
@@ -0,0 +1,19 @@
+"""
+Fallback for words that aren't Hebrew (eg. English)
+"""
+
+from typing import Awaitable, Callable
+
+
+class BatchFallback:
+    """
+    Fallback that phonemizes many words in a single call, eg. one espeak process
+    batch: list of words -> list of phonemes in the same order (may be async)
+    Phonemizer calls batch once with all the uncached words of a text (or batch of texts)
+    """
+
+    def __init__(self, batch: Callable[[list[str]], list[str] | Awaitable[list[str]]]):
+        self.batch = batch
+
+    def __call__(self, word: str) -> str:
+        return self.batch([word])[0]
@@ -75,7 +75,65 @@ def _vav_vowel(d):
     return None
 
 
+# Context bits of a neighbor letter, _letter only looks at these
+_HAS_SHVA, _HAS_SIN, _ALEF_TSERE, _IS_VAV, _IS_SHIN = 1, 2, 4, 8, 16
+_NO_DIAC, _HAS_HATAF_KAMATZ, _HAS_HOLAM = 32, 64, 128
+
+
+def _context(letter: Letter) -> int:
+    d, ch = letter.diac, letter.char
+    return (
+        (_SH in d) * _HAS_SHVA
+        | (_SI in d) * _HAS_SIN
+        | (ch + d == "אֵ") * _ALEF_TSERE
+        | (ch == "ו") * _IS_VAV
+        | (ch == "ש") * _IS_SHIN
+        | (not d) * _NO_DIAC
+        | (_HK in d) * _HAS_HATAF_KAMATZ
+        | (_HO in d) * _HAS_HOLAM
+    )
+
+
+# Transition table, filled on first use of each (letter, diacritics, diacritics
+# without hatama / prefix, prev context, next context, next vav diacritics) key.
+# Letter.diac is kept from creation even if all_diac changed later, so both are keyed
+# -> (phonemes, skip). A missing neighbor has context -1
+_TABLE: dict[tuple, tuple[tuple[str, ...], int]] = {}
+_TABLE_SIZE = 1 << 16
+
+
 def phonemize_word(letters: list[Letter]) -> list[str]:
+    contexts = [_context(letter) for letter in letters]
+    phonemes, i, count = [], 0, len(letters)
+    while i < count:
+        cur = letters[i]
+        nc = contexts[i + 1] if i + 1 < count else -1
+        key = (
+            cur.char,
+            cur.all_diac,
+            cur.diac,
+            contexts[i - 1] if i else -1,
+            nc,
+            # Vav pairs compare the diacritics of both letters
+            letters[i + 1].diac if nc != -1 and nc & _IS_VAV else None,
+        )
+        entry = _TABLE.get(key)
+        if entry is None:
+            prev = letters[i - 1] if i > 0 else None
+            nxt = letters[i + 1] if i + 1 < count else None
+            p, skip = _letter(cur, prev, nxt)
+            entry = (tuple(p), skip)
+            if len(_TABLE) < _TABLE_SIZE:
+                _TABLE[key] = entry
+        phonemes.extend(entry[0])
+        i += entry[1] + 1
+    return phonemes
+
+
+def phonemize_word_rules(letters: list[Letter]) -> list[str]:
+    """
+    phonemize_word without the transition table, for tests and benchmarks
+    """
     phonemes, i = [], 0
     while i < len(letters):
         prev = letters[i - 1] if i > 0 else None
@@ -0,0 +1,110 @@
+"""
+Vectorized phonemize_word for many words at once, requires numpy
+
+Words are encoded into padded arrays of letter ids, the neighbor contexts that the
+hebrew.py rules read are computed with masks over shifted arrays, and every distinct
+(letter, prev context, next context) key is resolved once with the rules.
+Output is identical to "".join(phonemize_word(letters)).
+"""
+
+from phonikud import hebrew
+from phonikud.variants import Letter
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(
+        "phonikud.hebrew_numpy requires numpy, install it with pip install phonikud[numpy]"
+    ) from e
+
+_PAD = -1
+_RADIX = 257  # Contexts are 8 bit, -1 for a missing neighbor
+
+
+def encode(words: list[list[Letter]]) -> tuple[np.ndarray, list[Letter], dict]:
+    """
+    Padded (words, letters) array of letter ids, the letter of every id and
+    the flat index of the first occurrence of every id
+    """
+    ids: dict[tuple[str, str, str], int] = {}
+    letters: list[Letter] = []
+    width = max(map(len, words), default=0)
+    encoded = np.full((len(words), width), _PAD, dtype=np.int32)
+    for row, word in enumerate(words):
+        codes = []
+        for letter in word:
+            identity = (letter.char, letter.all_diac, letter.diac)
+            code = ids.get(identity)
+            if code is None:
+                code = ids[identity] = len(letters)
+                letters.append(letter)
+            codes.append(code)
+        encoded[row, : len(codes)] = codes
+    return encoded, letters, ids
+
+
+def phonemize_words(words: list[list[Letter]]) -> list[str]:
+    """
+    Phonemes of many words, same as "".join(phonemize_word(letters)) for each
+    """
+    if not words:
+        return []
+    encoded, letters, ids = encode(words)
+    if encoded.shape[1] == 0:
+        return [""] * len(words)
+    pad = encoded == _PAD
+
+    # Per letter id tables, the last entry is the padding
+    context = np.array([hebrew._context(letter) for letter in letters] + [-1])
+    diacs = {}
+    diac_id = np.array(
+        [diacs.setdefault(letter.diac, len(diacs)) for letter in letters] + [-1]
+    )
+    context_at = context[encoded]
+    prev = np.full_like(context_at, -1)
+    prev[:, 1:] = context_at[:, :-1]
+    nxt = np.full_like(context_at, -1)
+    nxt[:, :-1] = context_at[:, 1:]
+    # Vav pairs compare the diacritics of both letters
+    next_diac = np.full_like(context_at, -1)
+    next_diac[:, :-1] = diac_id[encoded[:, 1:]]
+    next_diac[(nxt == -1) | ((nxt & hebrew._IS_VAV) == 0)] = -1
+
+    keys = ((encoded.astype(np.int64) * _RADIX + (prev + 1)) * _RADIX + (nxt + 1)) * (
+        len(diacs) + 1
+    ) + (next_diac + 1)
+    keys[pad] = -1
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(keys.shape)
+
+    # Resolve every distinct key with the rules, from its first occurrence
+    width = encoded.shape[1]
+    fragments, skips = [], []
+    for key, index in zip(unique.tolist(), first.tolist()):
+        if key == -1:
+            fragments.append("")
+            skips.append(0)
+            continue
+        row, col = divmod(index, width)
+        word = words[row]
+        cur = word[col]
+        before = word[col - 1] if col > 0 else None
+        after = word[col + 1] if col + 1 < len(word) else None
+        phonemes, skip = hebrew._letter(cur, before, after)
+        fragments.append("".join(phonemes))
+        skips.append(skip)
+    skip_at = np.array(skips, dtype=bool)[inverse]
+
+    # A letter is skipped if the previous one was phonemized and skips one
+    done = np.ones_like(skip_at)
+    while True:
+        skipped = np.zeros_like(skip_at)
+        skipped[:, 1:] = done[:, :-1] & skip_at[:, :-1]
+        update = ~skipped
+        if (update == done).all():
+            break
+        done = update
+
+    fragment_at = np.array(fragments, dtype=object)[inverse]
+    fragment_at[~done | pad] = ""
+    return ["".join(row) for row in fragment_at.tolist()]
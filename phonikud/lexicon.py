@@ -33,6 +33,8 @@ MODERN_SCHEMA = {
     "r": "ʁ",  # Resh
     "g": "ɡ",  # Gimel
 }
+# Replacements of single phoneme characters by schema name
+SCHEMAS = {"plain": {}, "modern": MODERN_SCHEMA}
 
 # Geresh
 GERESH_PHONEMES = {"ג": "dʒ", "ז": "ʒ", "ת": "ta", "צ": "tʃ", "ץ": "tʃ"}
@@ -103,7 +105,8 @@ SET_ENHANCED_DIACRITICS = set(
     [HATAMA_DIACRITIC, PREFIX_DIACRITIC, VOCAL_SHVA_DIACRITIC]
 )
 
-ADDITIONAL_PHONEMES = set()  # When using fallback
+# Always kept by post_clean. Fallback phonemes are kept only in the call they came from
+ADDITIONAL_PHONEMES = set()
 SET_PHONEMES = set(
     sorted(
         {
@@ -1,6 +1,30 @@
 import logging
 import os
-import colorlog
+
+
+class _ColorHandler(logging.StreamHandler):
+    """
+    Stream handler with colorized output, colorlog is imported on the first record
+    """
+
+    def emit(self, record: logging.LogRecord):
+        if self.formatter is None:
+            import colorlog
+
+            fmt = "%(log_color)s%(levelname)-8s%(reset)s [%(filename)s:%(lineno)d] %(message)s"
+            self.setFormatter(
+                colorlog.ColoredFormatter(
+                    fmt=fmt,
+                    log_colors={
+                        "DEBUG": "blue",
+                        "INFO": "green",
+                        "WARNING": "yellow",
+                        "ERROR": "red",
+                        "CRITICAL": "red",
+                    },
+                )
+            )
+        super().emit(record)
 
 
 def _create_logger():
@@ -9,23 +33,10 @@ def _create_logger():
     Usage: LOG_LEVEL=DEBUG python <script.py>
     """
 
-    handler = colorlog.StreamHandler()
-    fmt = "%(log_color)s%(levelname)-8s%(reset)s [%(filename)s:%(lineno)d] %(message)s"
-    handler.setFormatter(
-        colorlog.ColoredFormatter(
-            fmt=fmt,
-            log_colors={
-                "DEBUG": "blue",
-                "INFO": "green",
-                "WARNING": "yellow",
-                "ERROR": "red",
-                "CRITICAL": "red",
-            },
-        )
-    )
+    handler = _ColorHandler()
     # Get log level from LOG_LEVEL environment variable
     log_level = os.getenv("LOG_LEVEL", "WARNING").upper()
-    logger = colorlog.getLogger(__package__)
+    logger = logging.getLogger(__package__)
     logger.setLevel(level=getattr(logging, log_level, logging.WARNING))
     # Setup logging to stdout
     logger.addHandler(handler)
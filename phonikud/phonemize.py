@@ -1,16 +1,23 @@
 from phonikud import lexicon
 from phonikud.hebrew import Letter
+from phonikud.cache import CacheInfo, DiskCache, LRUCache
+from phonikud.tokens import Token, compile_runs_pattern, split_units
+from phonikud.pipeline import Pipeline, PhonemizerConfig, compile_schema, freeze_schema
+from phonikud.profiling import Hook
+from phonikud.fallback import BatchFallback
 from .expander import Expander
+from .expander.dictionary import Dictionary
 from phonikud.utils import (
     get_letters,
     normalize,
     post_normalize,
-    post_clean,
-    add_milra_hatama,
-    mark_vocal_shva,
+    add_milra_hatama_letters,
     sort_hatama,
 )
-from typing import Callable, Literal
+from typing import Awaitable, Callable, Iterable, Iterator, Literal, Mapping
+import functools
+import os
+import re as std_re
 import regex as re
 from phonikud.hebrew import phonemize_word
 
@@ -18,9 +25,175 @@ from phonikud.hebrew import phonemize_word
 class Phonemizer:
     # TODO: is that enough? what if there's punctuation around? other chars?
     fallback_pattern = r"[a-zA-Z]+"
+    fallback_re = re.compile(fallback_pattern)
+    hebrew_re = re.compile(lexicon.HE_PATTERN)
+    hyper_pattern = re.compile(r"\[(.+?)\]\(\/(.+?)\/\)")
+    hyper_pattern_dotall = re.compile(hyper_pattern.pattern, re.DOTALL)
+    # Typed runs for split_units, hyper phonemes may contain whitespace
+    # Uses stdlib re so that whitespace matches str.split()
+    runs_pattern = compile_runs_pattern(hyper_pattern.pattern)
+    runs_pattern_dotall = compile_runs_pattern(hyper_pattern.pattern, std_re.DOTALL)
 
-    def __init__(self):
+    def __init__(
+        self,
+        cache_size: int = 10000,
+        cache_path: str = None,
+        fallback_cache_size: int = 10000,
+        hooks: list[Hook] = None,
+    ):
+        """
+        cache_size: number of phonemized words to keep in memory, 0 to disable
+        fallback_cache_size: number of fallback results to keep in memory, 0 to disable
+        hooks: profiling hooks, see add_hook
+        cache_path: optional sqlite file to persist phonemized words across processes
+            and restarts. Defaults to PHONIKUD_CACHE_PATH environment variable
+        """
         self.expander = Expander()
+        self.word_cache = LRUCache(cache_size)
+        # Keyed by (fallback, word), results of different fallbacks don't mix
+        self.fallback_cache = LRUCache(fallback_cache_size)
+        # Compiled pipelines by PhonemizerConfig, few distinct options are expected
+        self.pipelines: dict[PhonemizerConfig, Pipeline] = {}
+        self.hooks: tuple[Hook, ...] = tuple(hooks or ())
+        cache_path = cache_path or os.getenv("PHONIKUD_CACHE_PATH")
+        self.disk_cache = DiskCache(cache_path) if cache_path else None
+
+    def warmup(self):
+        """
+        Load dictionaries and lazily imported dependencies now instead of on first use
+        """
+        self.expander.dictionary  # noqa: B018
+        for text in ["שָׁלוֹם 1", "hello"]:
+            self.compile(PhonemizerConfig()).phonemize(text)
+
+    def add_hook(self, hook: Hook):
+        """
+        Send stage enter / exit events to hook, see phonikud.profiling
+        eg. histogram = profiling.Histogram(); phonemizer.add_hook(histogram)
+        Pipelines compiled before keep their hooks, compile them again
+        """
+        self.hooks = (*self.hooks, hook)
+        self.pipelines = {}
+
+    def remove_hook(self, hook: Hook):
+        self.hooks = tuple(h for h in self.hooks if h is not hook)
+        self.pipelines = {}
+
+    def cache_info(self) -> CacheInfo:
+        return self.word_cache.info()
+
+    def fallback_cache_info(self) -> CacheInfo:
+        return self.fallback_cache.info()
+
+    def clear_cache(self):
+        self.word_cache.clear()
+        self.fallback_cache.clear()
+
+    def close(self):
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+    def compile(self, config: PhonemizerConfig) -> Pipeline:
+        """
+        Pipeline specialized for config, cached for repeated calls
+        eg. pipeline = phonemizer.compile(PhonemizerConfig(schema="plain"))
+        """
+        if type(config.schema) is not str:
+            # Custom schemas are mappings, pipelines are cached by config
+            config = config._replace(schema=freeze_schema(config.schema))
+        pipeline = self.pipelines.get(config)
+        if pipeline is None:
+            if len(self.pipelines) >= 64:
+                # eg. a new fallback lambda on every call
+                self.pipelines.clear()
+            pipeline = self.pipelines[config] = Pipeline(self, config)
+        return pipeline
+
+    def fallback_matches(self, unit: str, dictionary: Dictionary) -> Iterator[re.Match]:
+        """
+        Words of a normalized unit that are passed to the fallback
+        """
+        for match in self.fallback_re.finditer(unit):
+            if dictionary.get(match.group(0)):
+                # skip
+                # TODO: better API
+                continue
+            yield match
+
+    def fallback_words(
+        self, text: str, use_expander: bool, dictionary: Dictionary
+    ) -> list[str]:
+        """
+        Distinct words of the text that are passed to the fallback, in order
+        """
+        runs_pattern = self.runs_pattern_dotall if use_expander else self.runs_pattern
+        return list(
+            dict.fromkeys(
+                match.group(0)
+                for start, end, kinds in split_units(text, runs_pattern)
+                if "latin" in kinds or "hyper" in kinds
+                for match in self.fallback_matches(
+                    normalize(text[start:end]), dictionary
+                )
+            )
+        )
+
+    def cached_fallback_phonemes(
+        self, words: list[str], fallback: Callable
+    ) -> tuple[dict[str, str], list[str]]:
+        """
+        Split words into ({word: phonemes} found in the fallback cache, missing words)
+        """
+        found, missing = {}, []
+        for word in words:
+            phonemes = self.fallback_cache.get((fallback, word))
+            if phonemes is None:
+                missing.append(word)
+            else:
+                found[word] = phonemes
+        return found, missing
+
+    def store_fallback_phonemes(
+        self, words: list[str], phonemes: list[str], fallback: Callable
+    ) -> dict[str, str]:
+        phonemes = list(phonemes)
+        if len(phonemes) != len(words):
+            raise ValueError(
+                f"Fallback returned {len(phonemes)} results for {len(words)} words"
+            )
+        results = dict(zip(words, phonemes))
+        for word, value in results.items():
+            self.fallback_cache.put((fallback, word), value)
+        return results
+
+    def fallback_phonemes(
+        self,
+        texts: Iterable[str],
+        fallback: Callable,
+        use_expander: bool,
+        dictionary: Dictionary = None,
+    ) -> dict[str, str]:
+        """
+        Phonemes of every distinct fallback word in texts, from the fallback cache
+        or from a single call to fallback.batch if it's a BatchFallback
+        dictionary: words it has aren't passed to the fallback, defaults to the current one
+        """
+        dictionary = dictionary or self.expander.dictionary
+        words = list(
+            dict.fromkeys(
+                word
+                for text in texts
+                for word in self.fallback_words(text, use_expander, dictionary)
+            )
+        )
+        results, missing = self.cached_fallback_phonemes(words, fallback)
+        if missing:
+            if isinstance(fallback, BatchFallback):
+                phonemes = fallback.batch(missing)
+            else:
+                phonemes = [fallback(word) for word in missing]
+            results.update(self.store_fallback_phonemes(missing, phonemes, fallback))
+        return results
 
     def phonemize(
         self,
@@ -31,98 +204,139 @@ class Phonemizer:
         use_post_normalize: bool,  # For TTS
         predict_stress: bool,
         predict_vocal_shva: bool,
-        schema: Literal["plain", "modern"],
+        schema: Literal["plain", "modern"] | Mapping[str, str],
         fallback: Callable[[str], str] = None,
-    ) -> str | list[str]:
-        # normalize
-        text = normalize(text)
-
-        def fallback_replace_callback(match: re.Match):
-            word = match.group(0)
+        return_tokens: bool = False,
+        fallback_phonemes: dict[str, str] = None,
+        dictionary: Dictionary = None,
+    ) -> str | list[Token]:
+        """
+        See Pipeline.phonemize. The options are compiled into a Pipeline once and
+        reused by later calls with the same options, use compile() to keep one yourself.
+        """
+        config = PhonemizerConfig(
+            preserve_punctuation=preserve_punctuation,
+            preserve_stress=preserve_stress,
+            use_expander=use_expander,
+            use_post_normalize=use_post_normalize,
+            predict_stress=predict_stress,
+            predict_vocal_shva=predict_vocal_shva,
+            schema=schema,
+            fallback=fallback,
+        )
+        return self.compile(config).phonemize(
+            text, return_tokens, fallback_phonemes, dictionary
+        )
 
-            if self.expander.dictionary.dict.get(word):
-                # skip
-                # TODO: better API
-                return word
-            phonemes = fallback(word).strip()
-            # TODO: check that it has only IPA?!
-            for c in phonemes:
-                lexicon.ADDITIONAL_PHONEMES.add(c)
-            return phonemes
+    async def phonemize_async(
+        self,
+        text: str,
+        preserve_punctuation: bool,
+        preserve_stress: bool,
+        use_expander: bool,
+        use_post_normalize: bool,  # For TTS
+        predict_stress: bool,
+        predict_vocal_shva: bool,
+        schema: Literal["plain", "modern"] | Mapping[str, str],
+        fallback: Callable[[str], Awaitable[str] | str] = None,
+        return_tokens: bool = False,
+    ) -> str | list[Token]:
+        """
+        Same as phonemize, but fallback (or BatchFallback.batch) may be async.
+        Fallback is awaited once per distinct uncached word, all words of the text
+        concurrently, then the Hebrew rules run in the default executor to not block
+        the event loop.
+        """
+        import asyncio
+        import inspect
 
+        loop = asyncio.get_running_loop()
+        results = dictionary = None
         if fallback is not None:
-            text = re.sub(self.fallback_pattern, fallback_replace_callback, text)
-
-        if use_expander:
-            text = self.expander.expand_text(text)
-
-        def heb_replace_callback(match: re.Match, original_text: str):
-            word = match.group(0)
-            start_offset = match.start()
-            if start_offset > 0 and original_text[start_offset - 1] == "[":
-                # Skip if it starts with [ as it's used for hyper phonemes
-                return word
-
-            if predict_vocal_shva:
-                mark_vocal_shva(word)
-            if lexicon.HATAMA_DIACRITIC not in word and predict_stress:
-                word = add_milra_hatama(word)
-            letters: list[Letter] = get_letters(word)
-            letters = sort_hatama(letters)
-
-            phonemes: list[str] = phonemize_word(
-                letters,
+            # The dictionary may be reloaded while awaiting the fallback
+            dictionary = self.expander.dictionary
+            results, missing = self.cached_fallback_phonemes(
+                self.fallback_words(text, use_expander, dictionary), fallback
             )
-            phonemes = "".join(phonemes)
-            # syllables = get_syllables(phonemes)
-
-            # phonemes_text = "".join(phonemes)
-            # # if predict_stress and lexicon.STRESS not in phonemes_text and syllables:
-            # #     if len(syllables) == 1:
-            # #         syllables[-1] = lexicon.STRESS + syllables[-1]
-            # #         syllables[-1] = "".join(sort_stress(syllables[-1]))
-            # #     elif any(
-            # #         remove_nikud(word).endswith(i) for i in lexicon.MILHEL_PATTERNS
-            # #     ) or phonemes_text.endswith("ax"):
-            # #         # insert lexicon.STRESS in the first character of syllables[-2]
-            # #         syllables[-2] = lexicon.STRESS + syllables[-2]
-            # #         syllables[-2] = "".join(sort_stress(syllables[-2]))
-            # #     else:
-            # #         # insert in syllables[-1]
-            # #         syllables[-1] = lexicon.STRESS + syllables[-1]
-            # #         syllables[-1] = "".join(sort_stress(syllables[-1]))
-
-            # phonemes = "".join(syllables)
-            if use_post_normalize:
-                phonemes = post_normalize(phonemes)
-
-            if schema == "modern":
-                # We'll keep this feature simple for now
-                for k, v in lexicon.MODERN_SCHEMA.items():
-                    phonemes = re.sub(k, v, phonemes)
-            return phonemes
-
-        text = re.sub(
-            lexicon.HE_PATTERN, lambda match: heb_replace_callback(match, text), text
+            if missing:
+                if isinstance(fallback, BatchFallback):
+                    phonemes = fallback.batch(missing)
+                    if inspect.isawaitable(phonemes):
+                        phonemes = await phonemes
+                else:
+
+                    async def call_fallback(word: str) -> str:
+                        phonemes = fallback(word)
+                        if inspect.isawaitable(phonemes):
+                            phonemes = await phonemes
+                        return phonemes
+
+                    phonemes = await asyncio.gather(*map(call_fallback, missing))
+                results.update(
+                    self.store_fallback_phonemes(missing, phonemes, fallback)
+                )
+
+        return await loop.run_in_executor(
+            None,
+            functools.partial(
+                self.phonemize,
+                text,
+                preserve_punctuation=preserve_punctuation,
+                preserve_stress=preserve_stress,
+                use_expander=use_expander,
+                use_post_normalize=use_post_normalize,
+                predict_stress=predict_stress,
+                predict_vocal_shva=predict_vocal_shva,
+                schema=schema,
+                fallback=fallback,
+                return_tokens=return_tokens,
+                fallback_phonemes=results,
+                dictionary=dictionary,
+            ),
+        )
+
+    def phonemize_hebrew_word(
+        self,
+        word: str,
+        predict_stress: bool,
+        predict_vocal_shva: bool,
+        use_post_normalize: bool,
+        schema: Literal["plain", "modern"],
+    ) -> str:
+        # The word is parsed once, the stages below change the letters in place
+        # mark_vocal_shva used to run here but its result was discarded
+        letters: list[Letter] = get_letters(word)
+        if lexicon.HATAMA_DIACRITIC not in word and predict_stress:
+            letters = add_milra_hatama_letters(letters)
+        letters = sort_hatama(letters)
+
+        phonemes: list[str] = phonemize_word(
+            letters,
         )
+        phonemes = "".join(phonemes)
+        # syllables = get_syllables(phonemes)
+
+        # phonemes_text = "".join(phonemes)
+        # # if predict_stress and lexicon.STRESS not in phonemes_text and syllables:
+        # #     if len(syllables) == 1:
+        # #         syllables[-1] = lexicon.STRESS + syllables[-1]
+        # #         syllables[-1] = "".join(sort_stress(syllables[-1]))
+        # #     elif any(
+        # #         remove_nikud(word).endswith(i) for i in lexicon.MILHEL_PATTERNS
+        # #     ) or phonemes_text.endswith("ax"):
+        # #         # insert lexicon.STRESS in the first character of syllables[-2]
+        # #         syllables[-2] = lexicon.STRESS + syllables[-2]
+        # #         syllables[-2] = "".join(sort_stress(syllables[-2]))
+        # #     else:
+        # #         # insert in syllables[-1]
+        # #         syllables[-1] = lexicon.STRESS + syllables[-1]
+        # #         syllables[-1] = "".join(sort_stress(syllables[-1]))
 
-        def hyper_phonemes_callback(match: re.Match):
-            """
-            Expand hyper phonemes into normal phonemes
-            eg. [hello](/hɛˈloʊ/) -> hɛˈloʊ
-            """
-            matched_phonemes = match.group(2)
-            for c in matched_phonemes:
-                lexicon.ADDITIONAL_PHONEMES.add(c)
-            return matched_phonemes  # The phoneme is in the second group
-
-        text = re.sub(r"\[(.+?)\]\(\/(.+?)\/\)", hyper_phonemes_callback, text)
-
-        if not preserve_punctuation:
-            text = "".join(i for i in text if i not in lexicon.PUNCTUATION or i == " ")
-        if not preserve_stress:
-            text = "".join(i for i in text if i not in [lexicon.STRESS_PHONEME])
+        # phonemes = "".join(syllables)
         if use_post_normalize:
-            # We don't keep hypens in the output, but we should replace it with space
-            text = post_clean(text)
-        return text
+            phonemes = post_normalize(phonemes)
+
+        schema_table = compile_schema(schema)
+        if schema_table:
+            phonemes = phonemes.translate(schema_table)
+        return phonemes
@@ -0,0 +1,341 @@
+"""
+Phonemize options compiled once into a reusable pipeline
+"""
+
+from functools import lru_cache
+from typing import Callable, Literal, Mapping, NamedTuple
+from phonikud import lexicon
+from phonikud.expander.dictionary import Dictionary
+from phonikud.expander.phrases import PhraseMatcher
+from phonikud.tokens import ALL_RUN_KINDS, RunKind, Token, split_units, unit_tokens
+from phonikud.utils import normalize
+from phonikud.profiling import Hook, instrument
+
+
+class PhonemizerConfig(NamedTuple):
+    preserve_punctuation: bool = True
+    preserve_stress: bool = True
+    use_expander: bool = True
+    use_post_normalize: bool = True  # For TTS
+    predict_stress: bool = True
+    predict_vocal_shva: bool = True
+    # A name from lexicon.SCHEMAS or a {phoneme character: replacement} mapping
+    schema: Literal["plain", "modern"] | Mapping[str, str] = "modern"
+    fallback: Callable[[str], str] = None
+
+
+def freeze_schema(schema: str | Mapping[str, str]) -> str | tuple:
+    """
+    Hashable form of a schema, custom mappings become sorted item tuples
+    """
+    if isinstance(schema, Mapping):
+        return tuple(sorted(schema.items()))
+    return schema
+
+
+@lru_cache(maxsize=64)
+def compile_schema(schema: str | tuple) -> dict[int, str]:
+    """
+    Translate table of a frozen schema, see freeze_schema
+    """
+    if isinstance(schema, str):
+        if schema not in lexicon.SCHEMAS:
+            raise ValueError(f"Unknown schema {schema!r}, use {list(lexicon.SCHEMAS)}")
+        schema = tuple(lexicon.SCHEMAS[schema].items())
+    for phoneme, _ in schema:
+        if len(phoneme) != 1:
+            raise ValueError(f"Schema keys must be single characters, got {phoneme!r}")
+    return str.maketrans(dict(schema))
+
+
+class Pipeline:
+    """
+    Phonemizer specialized for a single PhonemizerConfig, see Phonemizer.compile
+    Everything that depends only on the options is prepared here once,
+    disabled stages are left out.
+    """
+
+    def __init__(self, phonemizer, config: PhonemizerConfig):
+        self.phonemizer = phonemizer
+        self.config = config
+        self.fallback = config.fallback
+        self.use_expander = config.use_expander
+        self.expander = phonemizer.expander
+        # Stages as attributes so that they can be instrumented by profiling hooks
+        self.normalize = normalize
+        self.fallback_phonemes = phonemizer.fallback_phonemes
+        self.expand_numbers = self.expander.expand_numbers
+        self.phonemize_hebrew_word = phonemizer.phonemize_hebrew_word
+        # Word phonemes depend only on the word and these options
+        self.word_options = (
+            config.predict_stress,
+            config.predict_vocal_shva,
+            config.use_post_normalize,
+            config.schema,
+        )
+        # The expander joins words with single spaces, so hyper phonemes can span lines
+        if config.use_expander:
+            self.hyper_pattern = phonemizer.hyper_pattern_dotall
+            self.runs_pattern = phonemizer.runs_pattern_dotall
+        else:
+            self.hyper_pattern = phonemizer.hyper_pattern
+            self.runs_pattern = phonemizer.runs_pattern
+
+        # finalize in a single translate, see post_clean for the rules
+        removed = ""
+        if not config.preserve_punctuation:
+            removed += "".join(sorted(lexicon.PUNCTUATION - {" "}))
+        if not config.preserve_stress:
+            removed += lexicon.STRESS_PHONEME
+        self.use_post_clean = config.use_post_normalize
+        table = str.maketrans("", "", removed)
+        if self.use_post_clean:
+            # Hyphens become spaces
+            table.setdefault(ord("-"), " ")
+            # Characters that are always kept, the schema may output new ones
+            schema_output = "".join(compile_schema(config.schema).values())
+            kept = {p for p in lexicon.SET_PHONEMES if len(p) == 1}
+            kept |= lexicon.PUNCTUATION | {" "} | set(schema_output)
+            self.known_chars = frozenset(kept | set(removed) | {"-"})
+        self.finalize_table = table or None
+        self.changed_chars = frozenset(map(chr, table))
+
+        if phonemizer.hooks:
+            self.instrument(phonemizer.hooks)
+
+    def instrument(self, hooks: tuple[Hook, ...]):
+        """
+        Send stage events to hooks, see phonikud.profiling
+        """
+        self.phonemize = instrument("phonemize", self.phonemize, hooks)
+        self.normalize = instrument("normalize", self.normalize, hooks)
+        self.fallback_phonemes = instrument("fallback", self.fallback_phonemes, hooks)
+        self.expand_numbers = instrument("expand", self.expand_numbers, hooks)
+        self.expand_dictionary = instrument("dictionary", self.expand_dictionary, hooks)
+        self.phonemize_hebrew_word = instrument(
+            "hebrew", self.phonemize_hebrew_word, hooks
+        )
+        self.finalize = instrument("finalize", self.finalize, hooks)
+
+    def phonemize(
+        self,
+        text: str,
+        return_tokens: bool = False,
+        fallback_phonemes: dict[str, str] = None,
+        dictionary: Dictionary = None,
+    ) -> str | list[Token]:
+        """
+        Each whitespace separated unit of the source text (hyper phonemes may contain spaces)
+        goes through the pipeline on its own, so the output can be mapped back to the source.
+        return_tokens=True returns Token list with source spans instead of a string
+        Fallback words are looked up all at once before phonemizing, see Phonemizer.fallback_phonemes.
+        fallback_phonemes: already known {word: phonemes} of the fallback words
+        dictionary: the one fallback_phonemes were looked up with, defaults to the current one
+        """
+        if dictionary is None and (self.use_expander or self.fallback is not None):
+            # Loaded on first use, the whole call keeps it even if it's reloaded meanwhile
+            dictionary = self.expander.dictionary
+        if self.fallback is not None and fallback_phonemes is None:
+            fallback_phonemes = self.fallback_phonemes(
+                [text], self.fallback, self.use_expander, dictionary
+            )
+        tokens: list[Token] = [] if return_tokens else None
+        # Phonemes from fallback and hyper phonemes, kept by post_clean in this call only
+        additional_phonemes: set[str] = set()
+
+        # First phonemize every unit, finalize once all fallback phonemes are known
+        units = split_units(text, self.runs_pattern)
+        if self.use_expander:
+            units = self.merge_phrases(text, units, dictionary.phrases)
+        outputs = [
+            self.phonemize_unit(
+                text,
+                start,
+                end,
+                kinds,
+                fallback_phonemes,
+                additional_phonemes,
+                tokens,
+                dictionary,
+            )
+            for start, end, kinds in units
+        ]
+
+        if return_tokens:
+            return [
+                token._replace(
+                    phonemes=self.finalize(token.phonemes, additional_phonemes)
+                )
+                for token in tokens
+            ]
+        if self.use_expander:
+            return " ".join(
+                self.finalize(i, additional_phonemes) for i in outputs if i is not None
+            )
+        parts, pos = [], 0
+        for (start, end, _), output in zip(units, outputs):
+            parts.append(self.finalize(text[pos:start], additional_phonemes))
+            parts.append(self.finalize(output, additional_phonemes))
+            pos = end
+        parts.append(self.finalize(text[pos:], additional_phonemes))
+        return "".join(parts)
+
+    def merge_phrases(
+        self,
+        text: str,
+        units: list[tuple[int, int, set[RunKind]]],
+        phrases: PhraseMatcher,
+    ) -> list[tuple[int, int, set[RunKind]]]:
+        """
+        Units of a dictionary phrase become a single unit, so the phrase reaches the dictionary
+        """
+        if phrases.max_length < 2 or len(units) < 2:
+            return units
+        words = [
+            None if "hyper" in kinds else normalize(text[start:end])
+            for start, end, kinds in units
+        ]
+        merged, pos = [], 0
+        for start, end in phrases.find(words):
+            if end - start < 2:
+                continue
+            merged += units[pos:start]
+            kinds = set().union(*(kinds for _, _, kinds in units[start:end]))
+            merged.append((units[start][0], units[end - 1][1], kinds))
+            pos = end
+        return merged + units[pos:] if pos else units
+
+    def phonemize_unit(
+        self,
+        text: str,
+        start: int,
+        end: int,
+        kinds: set[RunKind],
+        fallback_phonemes: dict[str, str],
+        additional_phonemes: set[str],
+        tokens: list[Token] | None,
+        dictionary: Dictionary | None,
+    ) -> str | None:
+        """
+        kinds: the kinds of runs in the unit, stages that don't apply to them are skipped
+        dictionary: for the expander and the fallback, None if both are disabled
+        """
+        source = text[start:end]
+        normalized = unit = self.normalize(source)
+
+        # (new_start, new_end, old_start, old_end) of fallback replacements
+        fallback_spans = []
+        # Hyper phonemes markup may contain anything
+        if "hyper" in kinds:
+            kinds = ALL_RUN_KINDS
+        if self.fallback is not None and "latin" in kinds:
+            parts, pos, length = [], 0, 0
+            for match in self.phonemizer.fallback_matches(unit, dictionary):
+                phonemes = fallback_phonemes[match.group(0)].strip()
+                # TODO: check that it has only IPA?!
+                additional_phonemes.update(phonemes)
+                parts.append(unit[pos : match.start()])
+                length += match.start() - pos
+                fallback_spans.append((length, length + len(phonemes), *match.span()))
+                parts.append(phonemes)
+                length += len(phonemes)
+                pos = match.end()
+            parts.append(unit[pos:])
+            unit = "".join(parts)
+            if fallback_spans and "number" not in kinds:
+                # Fallback output may have digits, they're expanded too
+                if any(map(str.isdecimal, unit)):
+                    kinds = kinds | {"number"}
+
+        expanded = unit
+        if self.use_expander:
+            # Same as Expander.expand_text
+            if "number" in kinds:
+                expanded = self.expand_numbers(unit)
+            else:
+                expanded = " ".join(unit.split())
+            expanded = self.expand_dictionary(expanded, dictionary)
+            if not expanded:
+                # Nothing left, the expander drops empty words
+                return None
+
+        # (start, end, word, phonemes) of Hebrew words
+        words, parts, pos = [], [], 0
+        for match in self.phonemizer.hebrew_re.finditer(expanded):
+            word = match.group(0)
+            if match.start() > 0 and expanded[match.start() - 1] == "[":
+                # Skip if it starts with [ as it's used for hyper phonemes
+                continue
+            phonemes = self.hebrew_word(word)
+            parts.append(expanded[pos : match.start()])
+            parts.append(phonemes)
+            pos = match.end()
+            if phonemes != word:
+                words.append((*match.span(), word, phonemes))
+        parts.append(expanded[pos:])
+        phonemized = "".join(parts)
+
+        output = phonemized
+        if "[" in phonemized:
+            # Expand hyper phonemes into normal phonemes
+            # eg. [hello](/hɛˈloʊ/) -> hɛˈloʊ
+            for match in self.hyper_pattern.finditer(phonemized):
+                additional_phonemes.update(match.group(2))
+            output = self.hyper_pattern.sub(r"\2", phonemized)
+
+        if tokens is not None:
+            if output != phonemized:
+                # Hyper phonemes are kept as a single token for the whole unit
+                tokens.append(Token(start, end, source, expanded, output, "hyper"))
+            else:
+                tokens.extend(
+                    unit_tokens(
+                        text,
+                        start,
+                        end,
+                        normalized,
+                        unit,
+                        expanded,
+                        fallback_spans,
+                        words,
+                    )
+                )
+        return output
+
+    def hebrew_word(self, word: str) -> str:
+        phonemizer = self.phonemizer
+        key = (word, *self.word_options)
+        phonemes = phonemizer.word_cache.get(key)
+        if phonemes is None and phonemizer.disk_cache is not None:
+            phonemes = phonemizer.disk_cache.get(key)
+            if phonemes is not None:
+                phonemizer.word_cache.put(key, phonemes)
+        if phonemes is None:
+            phonemes = self.phonemize_hebrew_word(word, *self.word_options)
+            phonemizer.word_cache.put(key, phonemes)
+            if phonemizer.disk_cache is not None:
+                phonemizer.disk_cache.put(key, phonemes)
+        return phonemes
+
+    def expand_dictionary(self, text: str, dictionary: Dictionary) -> str:
+        return dictionary.expand_text(text)
+
+    def finalize(self, text: str, additional_phonemes: set[str]) -> str:
+        """
+        Same as removing punctuation / stress and then post_clean, in one pass
+        """
+        table = self.finalize_table
+        if self.use_post_clean:
+            chars = set(text)
+            unknown = chars.difference(self.known_chars)
+            if not unknown and chars.isdisjoint(self.changed_chars):
+                return text  # Nothing to remove or replace
+            if unknown:
+                table = table.copy()
+                for char in unknown:
+                    if (
+                        char not in additional_phonemes
+                        and char not in lexicon.ADDITIONAL_PHONEMES
+                    ):
+                        table[ord(char)] = None
+        return text.translate(table) if table is not None else text
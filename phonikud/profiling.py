@@ -0,0 +1,218 @@
+"""
+Opt-in profiling hooks for the phonemization stages
+
+Add a hook with Phonemizer.add_hook, it receives enter / exit events of every stage
+with time.perf_counter() timestamps and the input size in characters.
+Without hooks the pipeline isn't instrumented at all.
+
+Stages:
+    phonemize   a whole phonemize call
+    normalize   normalize a unit
+    fallback    look up the fallback words of a text
+    expand      expand dates, times and numbers
+    dictionary  dictionary lookup
+    hebrew      phonemize a Hebrew word with the rules (word cache misses only)
+    finalize    punctuation / stress filters and post_clean
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+from typing import Callable, NamedTuple
+
+STAGES = [
+    "phonemize",
+    "normalize",
+    "fallback",
+    "expand",
+    "dictionary",
+    "hebrew",
+    "finalize",
+]
+
+
+class Hook:
+    """
+    Base class for profiling hooks, override enter and / or exit
+    Hooks may be called from many threads at once
+    """
+
+    def enter(self, stage: str, start: float, size: int):
+        pass
+
+    def exit(self, stage: str, start: float, end: float, size: int):
+        pass
+
+
+def instrument(stage: str, function: Callable, hooks: tuple[Hook, ...]) -> Callable:
+    """
+    Wrap function to send enter / exit events of stage to hooks
+    The first argument is the stage input, a string or a list of strings
+    """
+
+    def instrumented(value, *args, **kwargs):
+        size = len(value) if isinstance(value, str) else sum(map(len, value))
+        start = time.perf_counter()
+        for hook in hooks:
+            hook.enter(stage, start, size)
+        try:
+            return function(value, *args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            for hook in hooks:
+                hook.exit(stage, start, end, size)
+
+    return instrumented
+
+
+class StageStats(NamedTuple):
+    count: int
+    total: float  # Seconds
+    min: float
+    max: float
+    chars: int
+    # Number of calls by duration, bucket i counts calls under 2**i microseconds
+    buckets: list[int]
+
+    def percentile(self, q: float) -> float:
+        """
+        Upper bound in seconds of the bucket with the q-th call, eg. q=0.99
+        """
+        target, seen = q * self.count, 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return 2**i / 1e6
+        return self.max
+
+
+class Histogram(Hook):
+    """
+    Aggregate count, total time and a log2 duration histogram per stage
+    """
+
+    def __init__(self, buckets: int = 32):
+        self.size = buckets
+        self.lock = threading.Lock()
+        self.stages: dict[str, list] = {}
+
+    def exit(self, stage: str, start: float, end: float, size: int):
+        elapsed = end - start
+        bucket = min(int(elapsed * 1e6).bit_length(), self.size - 1)
+        with self.lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = [
+                    0,
+                    0.0,
+                    elapsed,
+                    elapsed,
+                    0,
+                    [0] * self.size,
+                ]
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = min(stats[2], elapsed)
+            stats[3] = max(stats[3], elapsed)
+            stats[4] += size
+            stats[5][bucket] += 1
+
+    def stats(self) -> dict[str, StageStats]:
+        with self.lock:
+            return {
+                stage: StageStats(*values[:5], list(values[5]))
+                for stage, values in self.stages.items()
+            }
+
+    def clear(self):
+        with self.lock:
+            self.stages.clear()
+
+    def report(self) -> str:
+        lines = [
+            f"{'stage':<12}{'count':>9}{'total s':>10}{'mean us':>10}{'p99 us':>10}"
+        ]
+        for stage, stats in sorted(self.stats().items(), key=lambda i: -i[1].total):
+            mean = stats.total / stats.count * 1e6
+            p99 = stats.percentile(0.99) * 1e6
+            lines.append(
+                f"{stage:<12}{stats.count:>9}{stats.total:>10.3f}{mean:>10.1f}{p99:>10.0f}"
+            )
+        return "\n".join(lines)
+
+
+class Span(NamedTuple):
+    stage: str
+    start: float
+    end: float
+    size: int
+    depth: int  # Nesting level, 0 is the phonemize call
+
+
+class Trace(Hook):
+    """
+    Per call trace, the spans of every stage of the last maxlen phonemize calls
+    Spans are in exit order, use depth / start to rebuild the tree
+    """
+
+    def __init__(self, maxlen: int = 100):
+        self.calls: deque[list[Span]] = deque(maxlen=maxlen)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def enter(self, stage: str, start: float, size: int):
+        local = self.local
+        if stage == "phonemize":
+            local.spans, local.depth = [], 0
+        elif getattr(local, "spans", None) is None:
+            return  # Stage outside of a phonemize call
+        else:
+            local.depth += 1
+
+    def exit(self, stage: str, start: float, end: float, size: int):
+        local = self.local
+        spans = getattr(local, "spans", None)
+        if spans is None:
+            return
+        depth = 0 if stage == "phonemize" else local.depth
+        spans.append(Span(stage, start, end, size, depth))
+        if stage == "phonemize":
+            local.spans = None
+            self.on_call(spans)
+        else:
+            local.depth -= 1
+
+    def on_call(self, spans: list[Span]):
+        with self.lock:
+            self.calls.append(spans)
+
+
+class Slowest(Trace):
+    """
+    Keep the traces of the n slowest phonemize calls
+    """
+
+    def __init__(self, n: int = 10):
+        super().__init__(maxlen=n)
+        self.n = n
+        self.heap: list[tuple[float, int, list[Span]]] = []
+        self.counter = 0
+
+    def on_call(self, spans: list[Span]):
+        call = spans[-1]
+        elapsed = call.end - call.start
+        with self.lock:
+            self.counter += 1
+            item = (elapsed, self.counter, spans)
+            if len(self.heap) < self.n:
+                heapq.heappush(self.heap, item)
+            elif elapsed > self.heap[0][0]:
+                heapq.heapreplace(self.heap, item)
+
+    def slowest(self) -> list[list[Span]]:
+        """
+        Traces of the slowest calls, slowest first
+        """
+        with self.lock:
+            return [spans for _, _, spans in sorted(self.heap, reverse=True)]
@@ -29,9 +29,11 @@ def has_vowel_diacs(s: str):
     return any(i in s for i in VOWEL_DIACS)
 
 
-def get_syllables(word: str) -> list[str]:
-    letters = phonikud.utils.get_letters(word)
-    syllables, cur = [], ""
+def get_syllable_spans(letters: list) -> list[tuple[int, int]]:
+    """
+    Syllables as (start, end) letter indices, they cover all the letters in order
+    """
+    spans, start = [], 0
     vowel_state = False
 
     i = 0
@@ -43,38 +45,41 @@ def get_syllables(word: str) -> list[str]:
         vav2 = i + 3 < len(letters) and letters[i + 3].char == "ו"
 
         if has_vowel:
-            if vowel_state:
-                syllables.append(cur)
-                cur = str(letter)
-            else:
-                cur += str(letter)
+            if vowel_state and start < i:
+                spans.append((start, i))
+                start = i
             vowel_state = True
-        else:
-            cur += str(letter)
 
         i += 1
 
         # If two וs are coming: force current syllable to end, and join both וs as next syllable
         if vav1 and vav2:
-            if cur:
-                # Finish current syllable
-                syllables.append(cur + str(letters[i]))
-                cur = ""
-            cur = str(letters[i + 1]) + str(letters[i + 2])
+            # Finish current syllable
+            spans.append((start, i + 1))
+            start = i + 1
             i += 3  # skip past the double-vav
             vowel_state = True
 
         # If one ו is coming, end the syllable now
         elif vav1 and letters[i + 1].diac:
-            if cur:
-                syllables.append(cur)
-                cur = ""
+            if start < i:
+                spans.append((start, i))
+                start = i
             vowel_state = False
 
-    if cur:
-        syllables.append(cur)
-    # print(syllables)
-    return syllables
+    if start < len(letters):
+        spans.append((start, len(letters)))
+    return spans
+
+
+def get_syllables(word: str) -> list[str]:
+    from phonikud.utils import get_letters
+
+    letters = get_letters(word)
+    return [
+        "".join(str(letter) for letter in letters[start:end])
+        for start, end in get_syllable_spans(letters)
+    ]
 
 
 def add_stress_to_syllable(s: str):
@@ -0,0 +1,166 @@
+"""
+Structured phonemization output with spans in the source text
+"""
+
+import re
+from typing import Literal, NamedTuple, get_args
+from phonikud import lexicon
+
+TokenKind = Literal["hebrew", "fallback", "hyper", "punctuation", "other"]
+RunKind = Literal[
+    "hyper", "whitespace", "hebrew", "number", "latin", "punctuation", "other"
+]
+ALL_RUN_KINDS = frozenset(get_args(RunKind))
+
+_PUNCTUATION = re.escape("".join(sorted(lexicon.PUNCTUATION - {" "})))
+_GAP_PATTERN = re.compile(
+    rf"(?P<punctuation>[{_PUNCTUATION}]+)|\s+|[^{_PUNCTUATION}\s]+"
+)
+
+
+class Token(NamedTuple):
+    start: int  # Span in the source text
+    end: int
+    text: str  # Source text
+    normalized: str  # Normalized and expanded form that was phonemized
+    phonemes: str
+    kind: TokenKind
+
+
+def compile_runs_pattern(hyper_pattern: str, flags: int = 0) -> re.Pattern:
+    """
+    Pattern that splits text into typed runs, the group name is the RunKind
+    Latin is any letter that isn't Hebrew and number any digit, so that they also
+    cover characters that become Latin letters or digits after normalize
+    """
+    return re.compile(
+        rf"(?P<hyper>{hyper_pattern})"
+        r"|(?P<whitespace>\s+)"
+        rf"|(?P<hebrew>{lexicon.HE_PATTERN})"
+        r"|(?P<number>\d+)"
+        r"|(?P<latin>[^\W\d_\u0590-\u05ff]+)"
+        rf"|(?P<punctuation>[{_PUNCTUATION}]+)"
+        r"|(?P<other>\S)",
+        flags,
+    )
+
+
+def split_units(text: str, pattern: re.Pattern) -> list[tuple[int, int, set[RunKind]]]:
+    """
+    Whitespace separated units of text in a single scan, hyper phonemes may contain
+    whitespace. Returns (start, end, kinds of the runs in the unit)
+    pattern: from compile_runs_pattern
+    """
+    units = []
+    start = end = None
+    kinds = set()
+    for match in pattern.finditer(text):
+        kind = match.lastgroup
+        if kind == "whitespace":
+            if start is not None:
+                units.append((start, end, kinds))
+                start, kinds = None, set()
+            continue
+        if start is None:
+            start = match.start()
+        end = match.end()
+        kinds.add(kind)
+    if start is not None:
+        units.append((start, end, kinds))
+    return units
+
+
+class OffsetMap:
+    """
+    Map offsets in a text after substitutions back to the text before them
+    spans: (new_start, new_end, old_start, old_end) of each substitution, in order
+    """
+
+    def __init__(self, spans: list[tuple[int, int, int, int]]):
+        self.spans = spans
+
+    def start(self, pos: int) -> int:
+        delta = 0
+        for new_start, new_end, old_start, old_end in self.spans:
+            if pos < new_start:
+                break
+            if pos < new_end:
+                return old_start
+            delta = new_end - old_end
+        return pos - delta
+
+    def end(self, pos: int) -> int:
+        delta = 0
+        for new_start, new_end, old_start, old_end in self.spans:
+            if pos <= new_start:
+                break
+            if pos <= new_end:
+                return old_end
+            delta = new_end - old_end
+        return pos - delta
+
+
+def split_gap(text: str, start: int, end: int):
+    """
+    Split text that wasn't phonemized as Hebrew into punctuation and other runs
+    Yields (start, end, kind), whitespace is skipped
+    """
+    for match in _GAP_PATTERN.finditer(text, start, end):
+        if match.group(0).isspace():
+            continue
+        kind = "punctuation" if match.group("punctuation") else "other"
+        yield match.start(), match.end(), kind
+
+
+def unit_tokens(
+    text: str,
+    start: int,
+    end: int,
+    normalized: str,
+    unit: str,
+    expanded: str,
+    fallback_spans: list[tuple[int, int, int, int]],
+    words: list[tuple[int, int, str, str]],
+) -> list[Token]:
+    """
+    Tokens of a single whitespace separated unit of the source text
+    normalized: the unit after normalize, unit: after fallback, expanded: after the expander
+    fallback_spans: (new_start, new_end, old_start, old_end) of fallback replacements
+    words: (start, end, word, phonemes) of Hebrew words in the expanded text
+    Spans are exact when normalization kept the length and the expander didn't change
+    the unit, otherwise all tokens get the span of the whole unit.
+    """
+    same = expanded == unit
+    aligned = same and len(normalized) == end - start
+    offsets = OffsetMap(fallback_spans)
+    # Fallback positions are lost if the expander changed the text
+    fallbacks = fallback_spans if same else []
+    tokens = []
+
+    def add(a: int, b: int, normalized_form: str, phonemes: str, kind: TokenKind):
+        if aligned:
+            s, e = start + offsets.start(a), start + offsets.end(b)
+        else:
+            s, e = start, end
+        tokens.append(Token(s, e, text[s:e], normalized_form, phonemes, kind))
+
+    def add_gap(a: int, b: int):
+        for fallback_start, fallback_end, old_start, old_end in fallbacks:
+            if fallback_end <= a or fallback_start >= b:
+                continue
+            for s, e, kind in split_gap(expanded, a, fallback_start):
+                add(s, e, expanded[s:e], expanded[s:e], kind)
+            phonemes = expanded[fallback_start:fallback_end]
+            word = normalized[old_start:old_end]
+            add(fallback_start, fallback_end, word, phonemes, "fallback")
+            a = fallback_end
+        for s, e, kind in split_gap(expanded, a, b):
+            add(s, e, expanded[s:e], expanded[s:e], kind)
+
+    pos = 0
+    for word_start, word_end, word, phonemes in words:
+        add_gap(pos, word_start)
+        add(word_start, word_end, word, phonemes, "hebrew")
+        pos = word_end
+    add_gap(pos, len(expanded))
+    return tokens
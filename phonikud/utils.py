@@ -31,45 +31,89 @@ def remove_nikud(text: str, to_keep=""):
     )
 
 
-@lru_cache(maxsize=10000)
+# Single character replacements of NORMALIZE_PATTERNS and DEDUPLICATE, in one pass
+NORMALIZE_TABLE = str.maketrans(
+    {
+        k: v
+        for patterns in (NORMALIZE_PATTERNS, lexicon.DEDUPLICATE)
+        for k, v in patterns.items()
+        if isinstance(v, str) and len(k) == 1
+    }
+)
+# Only letters with more than one diacritic may need sorting
+_unsorted_pattern = re.compile(r"(\p{L})(\p{M}{2,})")
+_whitespace_pattern = re.compile(r"(\s+)")
+
+
+def _normalize_segment(text: str) -> str:
+    if text.isascii():
+        return text  # Nothing to decompose, sort or replace
+    if not unicodedata.is_normalized("NFD", text):
+        text = unicodedata.normalize("NFD", text)
+    if _unsorted_pattern.search(text):
+        text = _unsorted_pattern.sub(sort_diacritics, text)
+    return text.translate(NORMALIZE_TABLE)
+
+
+_normalize_cached = lru_cache(maxsize=10000)(_normalize_segment)
+
+
 def normalize(text: str) -> str:
     """
     Normalize unicode (decomposite)
     Keep only Hebrew characters / punctuation / IPA
     Sort diacritics
+
+    None of the steps cross whitespace, so long texts are normalized and cached
+    per whitespace separated segment
     """
+    if len(text) <= 64:
+        return _normalize_cached(text)
+    return "".join(map(_normalize_cached, _whitespace_pattern.split(text)))
 
-    # Decompose text
-    text = unicodedata.normalize("NFD", text)
-    for k, v in NORMALIZE_PATTERNS.items():
-        text = re.sub(k, v, text)
-    for k, v in lexicon.DEDUPLICATE.items():
-        text = re.sub(k, v, text)
-    return text
+
+# Same API as when normalize was an lru_cache
+normalize.cache_clear = _normalize_cached.cache_clear
+normalize.cache_info = _normalize_cached.cache_info
+
+
+def _replace_end(word: str, suffix: str, replacement: str) -> str:
+    # Same as re.sub(suffix + "$"), "$" also matches before a final line break
+    if word.endswith(suffix):
+        return word[: -len(suffix)] + replacement
+    if word.endswith("\n") and word.endswith(suffix, 0, -1):
+        return word[: -len(suffix) - 1] + replacement + "\n"
+    return word
+
+
+def _post_normalize_word(word: str) -> str:
+    # remove glottal stop from end
+    word = _replace_end(word, "ʔ", "")
+    # remove h from end
+    word = _replace_end(word, "h", "")
+    word = _replace_end(word, "ˈh", "")
+    # remove j followed by a i
+    return _replace_end(word, "ij", "i")
 
 
 def post_normalize(phonemes: str):
-    new_phonemes = []
-    for word in phonemes.split(" "):
-        # remove glottal stop from end
-        word = re.sub(r"ʔ$", "", word)
-        # remove h from end
-        word = re.sub(r"h$", "", word)
-        word = re.sub(r"ˈh$", "", word)
-        # remove j followed by a i
-        word = re.sub(r"ij$", "i", word)
-        new_phonemes.append(word)
-    phonemes = " ".join(new_phonemes)
-    return phonemes
-
-
-def post_clean(phonemes: str):
+    if " " not in phonemes:
+        return _post_normalize_word(phonemes)
+    return " ".join(_post_normalize_word(word) for word in phonemes.split(" "))
+
+
+def post_clean(phonemes: str, additional_phonemes: set[str] = frozenset()):
+    """
+    Keep only known phonemes and punctuation
+    additional_phonemes: extra phonemes to keep, eg. from fallback or hyper phonemes
+    """
     clean = []
     for i in phonemes:
         if i == "-":
             clean.append(" ")
         elif (
             i in lexicon.SET_PHONEMES
+            or i in additional_phonemes
             or i in lexicon.ADDITIONAL_PHONEMES
             or i == " "
             or i in lexicon.PUNCTUATION
@@ -81,11 +125,21 @@ def post_clean(phonemes: str):
 letters_pattern = re.compile(r"(\p{L})([\p{M}'|]*)")
 
 
-# @lru_cache(maxsize=10000) TODO?
-def get_letters(word: str):
-    letters: list[tuple[str, str]] = letters_pattern.findall(word)  # with en_geresh
-    letters: list[Letter] = [Letter(i[0], i[1]) for i in letters]
-    return letters
+@lru_cache(maxsize=10000)
+def _parse_letters(word: str) -> tuple[tuple[str, str], ...]:
+    # (char, diacritics) of every letter, with en_geresh
+    # Diacritics are decomposed on their own, which orders them by combining class
+    return tuple(
+        (unicodedata.normalize("NFD", char), unicodedata.normalize("NFD", diac))
+        for char, diac in letters_pattern.findall(word)
+    )
+
+
+def get_letters(word: str) -> list[Letter]:
+    """
+    New Letter objects for a word, callers may change their diacritics
+    """
+    return [Letter(*parts) for parts in _parse_letters(word)]
 
 
 def get_unicode_names(text: str):
@@ -209,22 +263,22 @@ def add_milra_hatama(word: str):
     """
     Add stress to the first letter of the latest syllable
     """
-    syllables = phonikud.syllables.get_syllables(word)
-    stress_index = -1
-
-    if not syllables:
+    letters = get_letters(word)
+    if not letters:
         return word
+    spans = phonikud.syllables.get_syllable_spans(letters)
+    letters[spans[-1][0]].all_diac += lexicon.HATAMA_DIACRITIC
+    return "".join(str(i) for i in letters)
 
-    if len(syllables) == 1:
-        stress_index = 0
-
-    # Get latest syllable
-    milra = syllables[stress_index]
-    # Get letters
-    letters = get_letters(milra)
-    # Add Hatama
-    letters[0].all_diac += lexicon.HATAMA_DIACRITIC
 
-    # Replace latest syllable
-    syllables[stress_index] = "".join(str(i) for i in letters)
-    return "".join(syllables)
+def add_milra_hatama_letters(letters: list[Letter]) -> list[Letter]:
+    """
+    add_milra_hatama on parsed letters, same diacritics order as parsing its result
+    """
+    if letters:
+        spans = phonikud.syllables.get_syllable_spans(letters)
+        letter = letters[spans[-1][0]]
+        letter.all_diac = unicodedata.normalize(
+            "NFD", letter.all_diac + lexicon.HATAMA_DIACRITIC
+        )
+    return letters
@@ -1,14 +1,21 @@
-import phonikud
 from phonikud import lexicon
 
+# Diacritics that don't change the letter's sound, Letter.diac is without them
+_ENHANCED = str.maketrans("", "", lexicon.HATAMA_DIACRITIC + lexicon.PREFIX_DIACRITIC)
+
 
 class Letter:
-    def __init__(self, char: str, diac: list[str]):
-        self.char = phonikud.normalize(char)
-        self.all_diac = phonikud.normalize(diac)
-        self.diac = "".join(
-            i for i in self.all_diac if i not in [lexicon.HATAMA_DIACRITIC, lexicon.PREFIX_DIACRITIC]
-        )
+    """
+    A letter of an already normalized word, see utils.get_letters
+    diac is all_diac without hatama / prefix as of creation
+    """
+
+    __slots__ = ("char", "all_diac", "diac")
+
+    def __init__(self, char: str, all_diac: str, diac: str = None):
+        self.char = char
+        self.all_diac = all_diac
+        self.diac = all_diac.translate(_ENHANCED) if diac is None else diac
 
     def __str__(self):
         return self.char + self.all_diac
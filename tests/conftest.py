@@ -0,0 +1,14 @@
+import os
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def cache_dir(tmp_path_factory):
+    # Keep dictionary snapshots out of ~/.cache, also for subprocesses
+    previous = os.environ.get("PHONIKUD_CACHE_DIR")
+    os.environ["PHONIKUD_CACHE_DIR"] = str(tmp_path_factory.mktemp("cache"))
+    yield os.environ["PHONIKUD_CACHE_DIR"]
+    if previous is None:
+        del os.environ["PHONIKUD_CACHE_DIR"]
+    else:
+        os.environ["PHONIKUD_CACHE_DIR"] = previous
@@ -0,0 +1,34 @@
+from itertools import islice
+from phonikud import phonemize, phonemize_batch, phonemize_stream
+
+texts = [
+    "שָׁלוֹם עוֹלָם",
+    "אַתָּה חַיָּב לִי 50 שֶׁקֶל",
+    "מָה קוֹרֶה?",
+    "[hello](/hɛˈloʊ/)",
+] * 5
+
+
+def test_batch_keeps_order():
+    expected = [phonemize(text, schema="plain") for text in texts]
+    assert phonemize_batch(texts, workers=2, chunksize=3, schema="plain") == expected
+
+
+def test_batch_in_process():
+    assert phonemize_batch(texts[:2], workers=1) == [phonemize(t) for t in texts[:2]]
+
+
+def test_stream_file(tmp_path):
+    path = tmp_path / "corpus.txt"
+    path.write_text("\n".join(texts) + "\n", encoding="utf-8")
+    expected = [phonemize(text) for text in texts]
+    assert list(phonemize_stream(path, workers=2, window=2, chunksize=3)) == expected
+
+
+def test_stream_is_lazy():
+    def endless():
+        while True:
+            yield "שָׁלוֹם"
+
+    results = list(islice(phonemize_stream(endless()), 3))
+    assert results == [phonemize("שָׁלוֹם")] * 3
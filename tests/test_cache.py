@@ -0,0 +1,82 @@
+import inspect
+from pathlib import Path
+import gc
+import weakref
+from phonikud import phonemize
+from phonikud.cache import DiskCache
+from phonikud.phonemize import Phonemizer
+from phonikud.pipeline import PhonemizerConfig
+
+options = PhonemizerConfig()._asdict()
+
+
+def test_word_cache_hits():
+    phonemizer = Phonemizer(cache_size=10)
+    text = "שָׁלוֹם שָׁלוֹם עוֹלָם"
+    assert phonemizer.phonemize(text, **options) == phonemize(text)
+    info = phonemizer.cache_info()
+    assert (info.hits, info.misses, info.size) == (1, 2, 2)
+
+
+def test_word_cache_evicts():
+    phonemizer = Phonemizer(cache_size=2)
+    phonemizer.phonemize("אֶחָד שְׁנַיִם שָׁלוֹשׁ", **options)
+    info = phonemizer.cache_info()
+    assert info.size == 2 and info.evictions == 1
+
+
+def test_word_cache_keyed_by_options():
+    phonemizer = Phonemizer()
+    modern = phonemizer.phonemize("רָחֵל", **options)
+    plain = phonemizer.phonemize("רָחֵל", **{**options, "schema": "plain"})
+    assert modern != plain and phonemizer.cache_info().hits == 0
+
+
+def test_disk_cache_persists(tmp_path):
+    path = tmp_path / "words.db"
+    first = Phonemizer(cache_path=path)
+    expected = first.phonemize("שָׁלוֹם עוֹלָם", **options)
+    first.close()
+
+    second = Phonemizer(cache_path=path)
+    assert second.phonemize("שָׁלוֹם עוֹלָם", **options) == expected
+    assert second.disk_cache.hits == 2 and second.disk_cache.misses == 0
+    second.close()
+
+
+def test_disk_cache_invalidated_by_rules(tmp_path):
+    path = tmp_path / "words.db"
+    cache = DiskCache(path, fingerprint="old")
+    cache.put(("שָׁלוֹם",), "ʃalˈom")
+    cache.close()
+
+    assert DiskCache(path, fingerprint="old").get(("שָׁלוֹם",)) == "ʃalˈom"
+    assert DiskCache(path, fingerprint="new").get(("שָׁלוֹם",)) is None
+    assert DiskCache(path, fingerprint="old").get(("שָׁלוֹם",)) is None
+
+
+def test_disk_cache_flushed_when_collected(tmp_path):
+    path = tmp_path / "words.db"
+    cache = DiskCache(path)
+    cache.put(("שָׁלוֹם",), "ʃalˈom")
+    collected = weakref.ref(cache)
+    del cache
+    gc.collect()
+    assert collected() is None
+    assert DiskCache(path).get(("שָׁלוֹם",)) == "ʃalˈom"
+
+
+def test_rules_fingerprint_modules():
+    # Everything a cached word depends on changes the fingerprint
+    from phonikud import hebrew, utils
+    from phonikud.cache import RULES_MODULES
+    from phonikud.pipeline import compile_schema
+
+    for function in [
+        Phonemizer.phonemize_hebrew_word,
+        compile_schema,
+        hebrew.phonemize_word,
+        utils.get_letters,
+        utils.post_normalize,
+    ]:
+        assert Path(inspect.getfile(inspect.unwrap(function))).name in RULES_MODULES
@@ -0,0 +1,64 @@
+import json
+import pytest
+from phonikud import cli, phonemize
+from phonikud.cli import main
+
+texts = ["שָׁלוֹם עוֹלָם", "אַתָּה חַיָּב לִי 50 שֶׁקֶל", "מָה קוֹרֶה?"] * 3
+
+
+def test_formats(tmp_path):
+    (tmp_path / "corpus").mkdir()
+    source = tmp_path / "corpus" / "input.txt"
+    source.write_text("\n".join(texts) + "\n", encoding="utf-8")
+    expected = [phonemize(text) for text in texts]
+
+    main([str(source), "-o", str(tmp_path / "out.txt"), "-j", "2", "--chunksize", "2"])
+    assert (tmp_path / "out.txt").read_text(encoding="utf-8").splitlines() == expected
+
+    main([str(tmp_path / "corpus"), "-o", str(tmp_path / "out.tsv"), "-f", "tsv"])
+    lines = (tmp_path / "out.tsv").read_text(encoding="utf-8").splitlines()
+    assert lines == [f"{t}\t{p}" for t, p in zip(texts, expected)]
+
+    main([str(source), "-o", str(tmp_path / "out.jsonl"), "-f", "jsonl", "--tokens"])
+    with open(tmp_path / "out.jsonl", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["text"] for r in records] == texts
+    assert records[0]["tokens"][0]["start"] == 0
+
+
+def test_resume(tmp_path):
+    source = tmp_path / "input.txt"
+    source.write_text("\n".join(texts) + "\n", encoding="utf-8")
+    expected = [phonemize(text) for text in texts]
+    output = tmp_path / "out.txt"
+    # Interrupted run, the last line was written halfway
+    output.write_text(
+        "\n".join(expected[:4]) + "\n" + expected[4][:3], encoding="utf-8"
+    )
+
+    main([str(source), "-o", str(output), "--resume"])
+    assert output.read_text(encoding="utf-8").splitlines() == expected
+
+
+def test_completed_lines(tmp_path, monkeypatch):
+    # Lines are counted in chunks, a partial last line is removed
+    monkeypatch.setattr(cli, "CHUNK_SIZE", 4)
+    output = tmp_path / "out.txt"
+    for data, count in [
+        (b"", 0),
+        (b"partial", 0),
+        (b"one\ntwo\n", 2),
+        (b"one\ntwo\nthree\npart", 3),
+        (b"\n\n\n\n\n", 5),
+    ]:
+        output.write_bytes(data)
+        assert cli.completed_lines(output) == count
+        assert output.read_bytes().count(b"\n") == count
+        assert output.read_bytes().endswith(b"\n") or not output.read_bytes()
+
+
+def test_bad_fallback(capsys):
+    for spec in ["phonikud", "no_such_module:upper", "phonikud.cli:no_such_name"]:
+        with pytest.raises(SystemExit):
+            main(["--fallback", spec])
+        assert "--fallback" in capsys.readouterr().err
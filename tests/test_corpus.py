@@ -0,0 +1,79 @@
+import functools
+import pytest
+from phonikud import BatchFallback, phonemize, phonemize_corpus, read_corpus
+from phonikud.corpus import _fallback_identity, load_manifest, plan_shards, read_shard
+
+texts = ["שָׁלוֹם עוֹלָם", "אַתָּה חַיָּב לִי 50 שֶׁקֶל", "", "מָה קוֹרֶה?"] * 5
+
+
+def write_corpus(tmp_path):
+    first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+    first.write_text("\n".join(texts) + "\n", encoding="utf-8")
+    # No line break at the end
+    second.write_text("\n".join(texts), encoding="utf-8")
+    return [first, second]
+
+
+def test_shards_align_to_lines(tmp_path):
+    files = write_corpus(tmp_path)
+    shards = plan_shards(files, shard_size=50)
+    assert len(shards) > 2
+    assert [line for s in shards for line in read_shard(s)] == texts * 2
+
+
+def test_corpus_resume(tmp_path):
+    files = write_corpus(tmp_path)
+    output = tmp_path / "out"
+    expected = [phonemize(text) for text in texts * 2]
+
+    manifest = phonemize_corpus(files, output, workers=2, shard_size=100)
+    assert list(read_corpus(output)) == expected
+
+    # Lose a shard as if the job crashed while writing it
+    (output / manifest["shards"][1]["output"]).unlink()
+    mtimes = {
+        s["output"]: (output / s["output"]).stat().st_mtime_ns
+        for s in manifest["shards"][2:]
+    }
+    phonemize_corpus(files, output, workers=1, shard_size=100)
+    assert list(read_corpus(output)) == expected
+    # Completed shards weren't redone
+    for name, mtime in mtimes.items():
+        assert (output / name).stat().st_mtime_ns == mtime
+
+    # Different options restart the job
+    phonemize_corpus(files, output, workers=1, shard_size=100, schema="plain")
+    assert load_manifest(output)["job"]["options"]["schema"] == "plain"
+    assert list(read_corpus(output)) == [
+        phonemize(t, schema="plain") for t in texts * 2
+    ]
+
+
+def upper(words: list[str]) -> list[str]:
+    return [word.upper() for word in words]
+
+
+def test_corpus_resume_with_batch_fallback(tmp_path):
+    files = write_corpus(tmp_path)
+    output = tmp_path / "out"
+    fallback = BatchFallback(upper)
+    manifest = phonemize_corpus(
+        files, output, workers=1, shard_size=100, fallback=fallback
+    )
+    assert manifest["job"]["options"]["fallback"] == (f"BatchFallback:{__name__}:upper")
+    (output / manifest["shards"][1]["output"]).unlink()
+    first = output / manifest["shards"][0]["output"]
+    mtime = first.stat().st_mtime_ns
+    # A new instance of the same fallback continues the job
+    phonemize_corpus(
+        files, output, workers=1, shard_size=100, fallback=BatchFallback(upper)
+    )
+    assert first.stat().st_mtime_ns == mtime
+    assert list(read_corpus(output)) == [
+        phonemize(t, fallback=fallback) for t in texts * 2
+    ]
+
+    partial = functools.partial(str.replace, "a", "b")
+    assert _fallback_identity(partial) == "partial(('a', 'b'), {}):builtins:str.replace"
+    with pytest.raises(ValueError):
+        _fallback_identity(functools.partial(map, lambda word: word))
@@ -1,8 +1,193 @@
+import json
+import os
+import pytest
+import threading
 from phonikud.expander import Expander
+from phonikud.expander import snapshot
+from phonikud.expander.dictionary import Dictionary, compile_snapshot
+from phonikud.expander.lexicon_file import Lexicon, compile_lexicon
+from phonikud.expander.phrases import PhraseMatcher
+from phonikud.phonemize import Phonemizer
+from phonikud.pipeline import PhonemizerConfig
 from phonikud.utils import remove_nikud
 
+options = PhonemizerConfig()._asdict()
+
 
 def test_numbers():
     expander = Expander()
     text = expander.expand_text("35")
     assert "שלושים" in remove_nikud(text)
+
+
+def test_dictionary_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv("PHONIKUD_CACHE_DIR", str(tmp_path / "cache"))
+    source = tmp_path / "words.json"
+    source.write_text(json.dumps({"שלום": "שָׁלוֹם"}), encoding="utf-8")
+
+    # Small sources load faster without one
+    monkeypatch.delenv("PHONIKUD_SNAPSHOT", raising=False)
+    assert not snapshot.snapshot_enabled([source])
+    monkeypatch.setenv("PHONIKUD_SNAPSHOT", "1")
+    assert snapshot.snapshot_enabled([source])
+
+    path = compile_snapshot([source])
+    assert path.parent == tmp_path / "cache"
+    assert Dictionary([source], use_snapshot=True).dict == {"שלום": "שָׁלוֹם"}
+
+    # Changed sources are loaded again
+    source.write_text(json.dumps({"שלום": "שָׁלֹום"}), encoding="utf-8")
+    os.utime(source, ns=(0, path.stat().st_mtime_ns + 1))
+    assert Dictionary([source], use_snapshot=True).dict == {"שלום": "שָׁלֹום"}
+    assert Dictionary([source], use_snapshot=False).dict == {"שלום": "שָׁלֹום"}
+
+
+def test_phrases(tmp_path):
+    source = tmp_path / "phrases.json"
+    entries = {
+        "בית": "בַּיִת",
+        "בית  ספר": "בֵּית סֵפֶר",  # Whitespace in keys is normalized
+        "בית ספר יסודי": "בֵּית סֵפֶר יְסוֹדִי",
+        "3": "שָׁלוֹשׁ",  # Numbers are kept as is
+        "ספר טוב מאוד": "x",
+    }
+    source.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+    dictionary = Dictionary([source], use_snapshot=False)
+
+    assert dictionary.expand_text("בית") == "בַּיִת"
+    assert dictionary.expand_text("בית ספר") == "בֵּית סֵפֶר"
+    # Leftmost longest
+    assert dictionary.expand_text("בית ספר יסודי") == "בֵּית סֵפֶר יְסוֹדִי"
+    assert dictionary.expand_text(" בית ספר טוב מאוד 3\t") == " בֵּית סֵפֶר טוב מאוד 3\t"
+    assert dictionary.expand_text("ספר בית") == "ספר בַּיִת"
+
+    # Phrases across whitespace separated units of the pipeline
+    phonemizer = Phonemizer()
+    phonemizer.expander.dictionary = dictionary
+    expected = Phonemizer().phonemize("בֵּית סֵפֶר יפה, בַּיִת", **options)
+    assert phonemizer.phonemize("בית ספר יפה, בית", **options) == expected
+    tokens = phonemizer.phonemize("בית ספר", **options, return_tokens=True)
+    assert [(t.start, t.end) for t in tokens] == [(0, 7), (0, 7)]
+
+
+def test_phrase_matcher():
+    matcher = PhraseMatcher(
+        [("a", "b", "c", "d"), ("b", "c"), ("c", "d", "e"), ("d",), ("x",)]
+    )
+    # Partial match falls back to a suffix
+    assert matcher.find(list("abcx")) == [(1, 3), (3, 4)]
+    assert matcher.find(list("abcde")) == [(0, 4)]
+    # Leftmost wins over longer later matches
+    assert matcher.find(list("bcde")) == [(0, 2), (2, 3)]
+    assert matcher.find(list("cde")) == [(0, 3)]
+    assert matcher.find([]) == []
+
+
+def test_lexicon_file(tmp_path):
+    words = tmp_path / "words.json"
+    words.write_text(
+        json.dumps({"שלום": "שָׁלוֹם", "בית  ספר": "בֵּית סֵפֶר", "ריק": ""}),
+        encoding="utf-8",
+    )
+    user = tmp_path / "user.json"
+    user.write_text(json.dumps({"שלום": "שַׁלּוֹם"}), encoding="utf-8")
+    path = compile_lexicon([words, user], tmp_path / "words.phlex")
+
+    lexicon = Lexicon(path)
+    entries = Dictionary([words, user], use_snapshot=False).dict
+    assert len(lexicon) == len(entries) == 2
+    assert {key: lexicon.get(key) for key in lexicon} == entries
+    assert list(lexicon) == sorted(entries, key=lambda key: key.encode("utf-8"))
+    assert list(lexicon.phrases()) == ["בית ספר"]
+    assert lexicon.get("ריק") is None and "שלום" in lexicon
+    lexicon.close()
+
+    # Lexicons take priority over the JSON files and their phrases are matched
+    empty = tmp_path / "empty.json"
+    empty.write_text("{}", encoding="utf-8")
+    dictionary = Dictionary([words], use_snapshot=False, lexicons=[path])
+    assert dictionary.expand_text("שלום לבית ספר") == "שַׁלּוֹם לבית ספר"
+    dictionary = Dictionary([empty], use_snapshot=False, lexicons=[path])
+    assert dictionary.expand_text("שלום בית ספר") == "שַׁלּוֹם בֵּית סֵפֶר"
+
+    # Matched like the same keys from JSON, also inside sentences
+    phrases = {
+        "wifi": "וַייפַיי",
+        "בית ספר יסודי": "בֵּית סֵפֶר יְסוֹדִי",
+        "בית חולים": "בֵּית חוֹלִים",
+        "ספר טוב": "סֵפֶר טוֹב",
+    }
+    source = tmp_path / "phrases.json"
+    source.write_text(json.dumps(phrases, ensure_ascii=False), encoding="utf-8")
+    path = compile_lexicon([source], tmp_path / "phrases.phlex")
+    from_lexicon = Dictionary([empty], use_snapshot=False, lexicons=[path])
+    from_json = Dictionary([source], use_snapshot=False)
+    assert from_lexicon.phrases.max_length == 3
+    for text in [
+        "wifi",
+        "wifi here",
+        "בית ספר יסודי ובית חולים",
+        "בית ספר טוב",
+        "בית חולים wifi בית ספר",
+    ]:
+        assert from_lexicon.expand_text(text) == from_json.expand_text(text), text
+
+    (tmp_path / "bad.phlex").write_bytes(b"{}")
+    with pytest.raises(ValueError):
+        Lexicon(tmp_path / "bad.phlex")
+
+
+def test_reload(tmp_path):
+    source = tmp_path / "words.json"
+
+    def write(entries: dict, mtime_ns: int):
+        source.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+        os.utime(source, ns=(mtime_ns, mtime_ns))
+
+    write({"שלום": "שָׁלוֹם"}, 10**18)
+    events = []
+    phonemizer = Phonemizer()
+    expander = phonemizer.expander
+    expander.reload_callbacks.append(events.append)
+    assert not expander.reload()  # Not loaded yet
+    old = expander.dictionary = Dictionary([source], use_snapshot=False)
+    assert not expander.reload()
+
+    write({"שלום": "שַׁלּוֹם"}, 2 * 10**18)
+    assert expander.reload()
+    assert expander.expand_text("שלום") == "שַׁלּוֹם"
+    assert old.expand_text("שלום") == "שָׁלוֹם"
+    expected = Phonemizer().phonemize("שַׁלּוֹם", **options)
+    assert phonemizer.phonemize("שלום", **options) == expected
+    assert events[-1].error is None and events[-1].entries == 1
+
+    # Broken files keep the current dictionary
+    source.write_text("{", encoding="utf-8")
+    assert not expander.reload()
+    assert events[-1].error is not None
+    assert expander.expand_text("שלום") == "שַׁלּוֹם"
+    assert expander.reload_count == 1
+
+    # Same mtime and size, only the content changed
+    write({"שלום": "שָׁלוֹם"}, 10**18)
+    expander.dictionary = Dictionary([source], use_snapshot=False, use_hash=True)
+    write({"שלום": "שָׁלֹום"}, 10**18)
+    assert expander.reload()
+    assert expander.expand_text("שלום") == "שָׁלֹום"
+
+
+def test_reload_in_background(tmp_path):
+    source = tmp_path / "words.json"
+    source.write_text(json.dumps({"שלום": "שָׁלוֹם"}), encoding="utf-8")
+    reloaded = threading.Event()
+    expander = Expander(on_reload=lambda event: reloaded.set())
+    expander.dictionary = Dictionary([source], use_snapshot=False)
+    expander.watch(0.01)
+    try:
+        source.write_text(json.dumps({"שלום": "שַׁלּוֹם"}), encoding="utf-8")
+        os.utime(source, ns=(0, 0))
+        assert reloaded.wait(5)
+        assert expander.expand_text("שלום") == "שַׁלּוֹם"
+    finally:
+        expander.unwatch()
+    assert expander.watcher is None
@@ -1,4 +1,12 @@
-from phonikud import phonemize
+import asyncio
+import itertools
+import json
+import os
+import pytest
+from phonikud import BatchFallback, phonemize, phonemize_async, phonemize_batch
+from phonikud.expander.dictionary import Dictionary
+from phonikud.phonemize import Phonemizer
+from phonikud.pipeline import PhonemizerConfig
 
 
 def test_fallback():
@@ -8,4 +16,120 @@ def test_fallback():
     assert phonemize("hello", fallback=fallback) == "world"
 
 
+def test_fallback_async():
+    calls = []
+
+    async def fallback(text: str):
+        calls.append(text)
+        await asyncio.sleep(0.01)
+        return text[::-1]
+
+    text = "שָׁלוֹם hello, world hello!"
+    expected = phonemize(text, fallback=lambda word: word[::-1])
+    assert asyncio.run(phonemize_async(text, fallback=fallback)) == expected
+    # Each distinct word is looked up once
+    assert sorted(calls) == ["hello", "world"]
+
+
+def test_batch_fallback():
+    calls = []
+
+    def batch(words: list[str]) -> list[str]:
+        calls.append(words)
+        return [word.upper() for word in words]
+
+    fallback = BatchFallback(batch)
+    texts = ["hello world שָׁלוֹם hello", "world foo"]
+    results = phonemize_batch(texts, workers=1, fallback=fallback)
+    assert results == [phonemize(text, fallback=str.upper) for text in texts]
+    # One call for all distinct words of the batch, then served from cache
+    assert calls == [["hello", "world", "foo"]]
+
+
+def test_batch_fallback_larger_than_cache(monkeypatch):
+    import phonikud
+
+    monkeypatch.setattr(phonikud, "_phonemizer", Phonemizer(fallback_cache_size=100))
+    calls = []
+
+    def batch(words: list[str]) -> list[str]:
+        calls.append(words)
+        return [word.upper() for word in words]
+
+    words = ["".join(letters) for letters in itertools.product("abcdefghij", repeat=3)]
+    texts = [" ".join(words[i : i + 5]) for i in range(0, len(words), 5)]
+    results = phonemize_batch(texts, workers=1, fallback=BatchFallback(batch))
+    assert results == [phonemize(text, fallback=str.upper) for text in texts]
+    # The prefetched words are used even after they were evicted from the cache
+    assert len(calls) == 1 and len(calls[0]) == len(words)
+
+
+def test_fallback_cache():
+    calls = []
+
+    def fallback(word: str) -> str:
+        calls.append(word)
+        return word
+
+    phonemizer = Phonemizer(fallback_cache_size=1)
+    options = {**PhonemizerConfig()._asdict(), "fallback": fallback}
+    phonemizer.phonemize("hello", **options)
+    phonemizer.phonemize("hello", **options)
+    assert calls == ["hello"]
+    phonemizer.phonemize("world hello", **options)
+    assert calls == ["hello", "world"]
+    assert phonemizer.fallback_cache_info().evictions == 1
+
+
 test_fallback()
+
+
+def test_fallback_with_reload(tmp_path):
+    # Dictionary words skip the fallback, a reload in between must not lose them
+    source = tmp_path / "words.json"
+
+    def write(entries: dict, mtime_ns: int):
+        source.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+        os.utime(source, ns=(mtime_ns, mtime_ns))
+
+    write({"hello": "הֶלוֹ"}, 10**18)
+    phonemizer = Phonemizer()
+    expander = phonemizer.expander
+    expander.dictionary = Dictionary([source], use_snapshot=False)
+    options = {**PhonemizerConfig()._asdict(), "fallback": str.upper}
+    text = "hello world"
+    expected = phonemizer.phonemize(text, **options)
+
+    dictionary = expander.dictionary
+    prefetched = phonemizer.fallback_phonemes([text], str.upper, True, dictionary)
+    assert prefetched == {"world": "WORLD"}
+    write({}, 2 * 10**18)
+    assert expander.reload()
+    result = phonemizer.phonemize(
+        text, **options, fallback_phonemes=prefetched, dictionary=dictionary
+    )
+    assert result == expected
+
+    async def fallback(word: str) -> str:
+        # Reloaded after the fallback words were found
+        write({"hello": "הֶלוֹ"}, 3 * 10**18)
+        assert expander.reload()
+        return word.upper()
+
+    options["fallback"] = fallback
+    assert asyncio.run(phonemizer.phonemize_async("hello", **options)) == "HELLO"
+    options["fallback"] = str.upper
+    assert phonemizer.phonemize("hello", **options) == expected.split()[0]
+
+
+def test_batch_fallback_count():
+    # Results are matched to words by position, any other count is an error
+    for batch in [lambda words: words[1:], lambda words: [*words, "extra"]]:
+        with pytest.raises(ValueError):
+            phonemize("hello world", fallback=BatchFallback(batch))
+
+
+def test_fallback_with_digits():
+    # Digits in fallback output are expanded like digits in the text
+    assert phonemize("abc", fallback=lambda word: "3") == phonemize("3")
+    assert phonemize("abc 2", fallback=lambda word: "1") == phonemize("1 2")
@@ -0,0 +1,68 @@
+import csv
+from pathlib import Path
+import pytest
+from phonikud import hebrew
+from phonikud.utils import add_milra_hatama, add_milra_hatama_letters, get_letters
+
+tables = Path(__file__).parent / "phonemize_test_tables"
+
+
+def test_table_matches_rules():
+    words = []
+    for file in sorted(tables.glob("*.csv")):
+        with open(file, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                words += row["hebrew_with_nikkud"].split()
+    words += [add_milra_hatama(word) for word in words]
+    hebrew._TABLE.clear()
+    for _ in range(2):  # Filling the table, then from the table
+        for word in words:
+            letters = get_letters(word)
+            assert hebrew.phonemize_word(letters) == hebrew.phonemize_word_rules(
+                letters
+            ), word
+
+
+def test_letters_are_not_shared():
+    first = get_letters("שָׁלוֹם")
+    first[0].all_diac += "֫"
+    second = get_letters("שָׁלוֹם")
+    assert second[0].all_diac != first[0].all_diac
+    assert second[0].diac == first[0].diac  # diac is fixed at creation
+
+
+def test_numpy_engine():
+    pytest.importorskip("numpy")
+    from phonikud.hebrew_numpy import phonemize_words
+
+    words = []
+    for file in sorted(tables.glob("*.csv")):
+        with open(file, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                words += row["hebrew_with_nikkud"].split()
+    words += [add_milra_hatama(word) for word in words]
+    # Letters that skip the next one, also in a row
+    words += ["יִשָּׂשכָר", "מִצְווֹת", "וּווּ", "שַׂשששׂ", "וווו", ""]
+    letters = [get_letters(word) for word in words]
+    expected = ["".join(hebrew.phonemize_word_rules(w)) for w in letters]
+    assert phonemize_words(letters) == expected
+    assert phonemize_words([]) == []
+
+
+def test_milra_hatama_letters():
+    for file in sorted(tables.glob("*.csv")):
+        with open(file, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                for word in row["hebrew_with_nikkud"].split():
+                    expected = get_letters(add_milra_hatama(word))
+                    letters = add_milra_hatama_letters(get_letters(word))
+                    assert list(map(str, letters)) == list(map(str, expected)), word
+
+
+def test_table_with_changed_diacritics():
+    # Letter.diac stays as created, a changed all_diac must not poison the table
+    changed = get_letters("שָם")
+    changed[0].all_diac = get_letters("שָׂם")[0].all_diac
+    assert hebrew.phonemize_word(changed) == hebrew.phonemize_word_rules(changed)
+    letters = get_letters("שָׂם")
+    assert hebrew.phonemize_word(letters) == hebrew.phonemize_word_rules(letters)
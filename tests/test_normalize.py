@@ -0,0 +1,43 @@
+import random
+import unicodedata
+import regex as re
+from phonikud import lexicon
+from phonikud.utils import NORMALIZE_PATTERNS, normalize, post_normalize
+
+
+def reference_normalize(text: str) -> str:
+    text = unicodedata.normalize("NFD", text)
+    for k, v in NORMALIZE_PATTERNS.items():
+        text = re.sub(k, v, text)
+    for k, v in lexicon.DEDUPLICATE.items():
+        text = re.sub(k, v, text)
+    return text
+
+
+def test_matches_reference():
+    rng = random.Random(0)
+    alphabet = "שׁשָׁלוֹםﬠéa1 \t\n  ־״׳'|" + "".join(chr(c) for c in range(0x0591, 0x05C8))
+    texts = ["", "hello", "שָׁלוֹם עוֹלָם", "צה״ל ג׳ירפה עַל־כֵּן"]
+    texts += ["".join(rng.choices(alphabet, k=rng.randint(1, 200))) for _ in range(500)]
+    for text in texts:
+        assert normalize(text) == reference_normalize(text), repr(text)
+
+
+def reference_post_normalize(phonemes: str) -> str:
+    words = []
+    for word in phonemes.split(" "):
+        word = re.sub(r"ʔ$", "", word)
+        word = re.sub(r"h$", "", word)
+        word = re.sub(r"ˈh$", "", word)
+        word = re.sub(r"ij$", "i", word)
+        words.append(word)
+    return " ".join(words)
+
+
+def test_post_normalize_matches_reference():
+    rng = random.Random(0)
+    texts = [
+        "".join(rng.choices("aijhʔˈ \n", k=rng.randint(0, 12))) for _ in range(2000)
+    ]
+    for text in texts:
+        assert post_normalize(text) == reference_post_normalize(text), repr(text)
@@ -0,0 +1,58 @@
+import random
+from itertools import product
+import pytest
+from phonikud import PhonemizerConfig, lexicon, phonemize
+from phonikud.phonemize import Phonemizer
+from phonikud.utils import post_clean
+
+
+def test_compiled_pipeline():
+    phonemizer = Phonemizer()
+    text = "שָׁלוֹם, עוֹלָם! [x](/ʁ/) hello 12"
+    for config in [
+        PhonemizerConfig(),
+        PhonemizerConfig(preserve_punctuation=False, preserve_stress=False),
+        PhonemizerConfig(use_expander=False, schema="plain"),
+        PhonemizerConfig(use_post_normalize=False, fallback=str.upper),
+    ]:
+        pipeline = phonemizer.compile(config)
+        assert phonemizer.compile(config) is pipeline
+        assert pipeline.phonemize(text) == phonemize(text, **config._asdict())
+
+
+def test_custom_schema():
+    text = "חָם רַע"
+    plain = phonemize(text, schema="plain")
+    assert phonemize(text, schema=lexicon.MODERN_SCHEMA) == phonemize(text)
+    # Custom output characters are kept by the final clean up
+    custom = phonemize(text, schema={"x": "kh", "r": "ɹ"})
+    assert custom == plain.replace("x", "kh").replace("r", "ɹ")
+    with pytest.raises(ValueError):
+        phonemize(text, schema="unknown")
+    with pytest.raises(ValueError):
+        phonemize(text, schema={"ts": "c"})
+
+
+def test_finalize_matches_post_clean():
+    rng = random.Random(0)
+    alphabet = "aeiouʃχˈ.,!? -wxyzé\n\t"
+    phonemizer = Phonemizer()
+    for preserve_punctuation, preserve_stress in product([True, False], repeat=2):
+        pipeline = phonemizer.compile(
+            PhonemizerConfig(
+                preserve_punctuation=preserve_punctuation,
+                preserve_stress=preserve_stress,
+            )
+        )
+        removed = set()
+        if not preserve_punctuation:
+            removed |= lexicon.PUNCTUATION - {" "}
+        if not preserve_stress:
+            removed.add(lexicon.STRESS_PHONEME)
+        for _ in range(200):
+            text = "".join(rng.choices(alphabet, k=20))
+            additional = set(rng.sample("xyzé", 2))
+            expected = post_clean(
+                "".join(c for c in text if c not in removed), additional
+            )
+            assert pipeline.finalize(text, additional) == expected, repr(text)
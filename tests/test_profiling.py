@@ -0,0 +1,39 @@
+from phonikud import PhonemizerConfig, profiling
+from phonikud.phonemize import Phonemizer
+
+options = PhonemizerConfig()._asdict()
+
+
+def test_hooks():
+    histogram, trace, slowest = (
+        profiling.Histogram(),
+        profiling.Trace(),
+        profiling.Slowest(2),
+    )
+    phonemizer = Phonemizer(hooks=[histogram, trace])
+    phonemizer.add_hook(slowest)
+    texts = ["שָׁלוֹם 12", "hello עוֹלָם", "שָׁלוֹם"]
+    for text in texts:
+        phonemizer.phonemize(text, **{**options, "fallback": str.upper})
+
+    stats = histogram.stats()
+    assert stats["phonemize"].count == 3
+    assert stats["phonemize"].chars == sum(map(len, texts))
+    assert stats["expand"].count == 1  # Only the unit with digits
+    assert set(stats) <= set(profiling.STAGES)
+    assert "phonemize" in histogram.report()
+
+    assert len(trace.calls) == 3
+    spans = trace.calls[0]
+    assert spans[-1].stage == "phonemize" and spans[-1].depth == 0
+    assert all(span.depth == 1 for span in spans[:-1])
+    assert len(slowest.slowest()) == 2
+
+    phonemizer.remove_hook(histogram)
+    phonemizer.phonemize("שָׁלוֹם", **options)
+    assert histogram.stats()["phonemize"].count == 3
+
+
+def test_no_hooks_not_instrumented():
+    pipeline = Phonemizer().compile(PhonemizerConfig())
+    assert pipeline.phonemize.__func__ is type(pipeline).phonemize
@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+
+def test_import_is_lazy():
+    script = """
+import sys
+import phonikud
+heavy = ["phonikud.phonemize", "phonikud.expander", "regex", "num2words", "colorlog"]
+print(",".join(m for m in heavy if m in sys.modules))
+phonikud.warmup()
+print(callable(phonikud.phonemize), "dictionary" in phonikud.phonemizer.expander.__dict__)
+"""
+    output = subprocess.check_output([sys.executable, "-c", script], text=True)
+    loaded, warm = output.splitlines()
+    assert loaded == ""
+    assert warm == "True True"
+
+
+def test_submodule_import_keeps_function():
+    import phonikud
+    from phonikud.phonemize import Phonemizer
+
+    assert callable(phonikud.phonemize)
+    assert phonikud.Phonemizer is Phonemizer
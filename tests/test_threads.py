@@ -0,0 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
+from phonikud import lexicon, phonemize
+
+
+def test_fallback_phonemes_scoped_per_call():
+    assert phonemize("hello", fallback=lambda word: "ɜ") == "ɜ"
+    # Not a known phoneme without the fallback of the previous call
+    assert phonemize("ɜ") == ""
+    assert not lexicon.ADDITIONAL_PHONEMES
+
+
+def test_shared_phonemizer_threads():
+    texts = [f"שָׁלוֹם hello [x](/{chr(0x250 + i)}/)" for i in range(32)] * 8
+
+    def run(text: str):
+        return phonemize(text, fallback=lambda word: "ɜ" + word)
+
+    expected = [run(text) for text in texts]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(run, texts)) == expected
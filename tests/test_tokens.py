@@ -0,0 +1,60 @@
+from phonikud import Token, phonemize
+from phonikud.phonemize import Phonemizer
+from phonikud.tokens import split_units
+
+
+def test_tokens_spans():
+    text = "שָׁלוֹם, עוֹלָם! 50₪"
+    tokens = phonemize(text, return_tokens=True)
+    for token in tokens:
+        assert text[token.start : token.end] == token.text
+    assert tokens[:4] == [
+        Token(0, 7, "שָׁלוֹם", "שָׁלוֹם", "ʃalˈom", "hebrew"),
+        Token(7, 8, ",", ",", ",", "punctuation"),
+        Token(9, 15, "עוֹלָם", "עוֹלָם", "ʔolˈam", "hebrew"),
+        Token(15, 16, "!", "!", "!", "punctuation"),
+    ]
+    # Expanded words keep the span of the source word
+    assert [(t.text, t.kind) for t in tokens[4:]] == [
+        ("50₪", "hebrew"),
+        ("50₪", "other"),
+    ]
+
+
+def test_tokens_fallback_and_hyper():
+    tokens = phonemize("hello, שָׁלוֹם", return_tokens=True, fallback=lambda w: "həloʊ")
+    assert [(t.start, t.end, t.phonemes, t.kind) for t in tokens] == [
+        (0, 5, "həloʊ", "fallback"),
+        (5, 6, ",", "punctuation"),
+        (7, 14, "ʃalˈom", "hebrew"),
+    ]
+    tokens = phonemize("[עוֹלָם](/ʔolˈam/)", return_tokens=True)
+    assert tokens == [
+        Token(0, 18, "[עוֹלָם](/ʔolˈam/)", "[עוֹלָם](/ʔolˈam/)", "ʔolˈam", "hyper")
+    ]
+
+
+def test_tokens_match_text_output():
+    text = "הַיּ֫וֹם נִלְמַ֫ד אַנְגְּלִ֫ית [hello](/hɛˈloʊ/)"
+    tokens = phonemize(text, return_tokens=True)
+    assert " ".join(t.phonemes for t in tokens) == phonemize(text)
+
+
+def test_split_units():
+    pattern = Phonemizer.runs_pattern
+    text = "שָׁלוֹם, hello [a b](/x y/)  12:30 é"
+    units = split_units(text, pattern)
+    assert [text[start:end] for start, end, _ in units] == [
+        "שָׁלוֹם,",
+        "hello",
+        "[a b](/x y/)",
+        "12:30",
+        "é",
+    ]
+    assert [kinds for _, _, kinds in units] == [
+        {"hebrew", "punctuation"},
+        {"latin"},
+        {"hyper"},
+        {"number", "other"},
+        {"latin"},
+    ]